@@ -1,16 +1,18 @@
 import os
-import glob
 import json
 from datetime import datetime
 import traceback
-from bs4 import BeautifulSoup
+import xml.etree.ElementTree as ET
 import numpy as np
 # import lxml
-# import copy
+import copy
 import pandas as pd
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from utils import get_wkt_crs
 from utils import get_schema_keys
+from utils import file_cache
+from utils import dbf_summary
 
 def parse_prj(prj, prj_dir, prj_name, prj_template_json, shp, output_dir, keywords, prj_id, model_application_key_order):
     # Open the project file, read lines, strip newlines, copy lines to keyValueList
@@ -209,45 +211,168 @@ def parse_prj(prj, prj_dir, prj_name, prj_template_json, shp, output_dir, keywor
 
     return sim_pathnames
 
-def parse_sims(sim_pathnames, prj_dir, prj_name, sim_template_json, output_dir, simulation_key_order):
-    # Parse Sims from each sim file get basics and alt file. from alt file get inputs
-    path = sim_pathnames[0]
-    # for path in sim_pathnames:
-    with open(path, 'r') as f:
-        sim_file = f.read()
-
-    soupData_sim = BeautifulSoup(sim_file, 'xml')
-    sim_name = soupData_sim.find_all('Name')[0].text
-    sim_description = soupData_sim.find_all('Description')[0].text
-    alt_name = soupData_sim.find_all('AlternativeName')[0].text
-    alt_path = soupData_sim.find_all('AlternativePath')[0].text.split("../")[-1]
-    event_name = soupData_sim.find_all('EventName')[0].text
-    timewindow_name = soupData_sim.find_all('TimeWindowName')[0].text
-    timewindow_path = soupData_sim.find_all('TimeWindowPath')[0].text.split("../")[-1]
+def read_xml_tags(xml_file, tags):
+    """
+    Get the text of the first element with each of the wanted tag names in an XML file, in a single streaming pass.
+    Stops reading as soon as every wanted tag has been found, and clears the elements that have been read so memory stays small on large files.
+    Returns a dictionary of {tag: text}. Tags that are not in the file are not in the dictionary.
+    """
+    tags = set(tags)
+    found = {}
+    # Whether each open element is a wanted tag, and the number of open wanted elements. Elements inside a wanted element are kept for its text.
+    open_wanted = []
+    wanted_depth = 0
+    with open(xml_file, 'rb') as f:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            # Drop any namespace from the tag, to match the tag names in the file.
+            tag = elem.tag.rsplit('}', 1)[-1]
+            if event == 'start':
+                wanted = tag in tags and tag not in found
+                open_wanted.append(wanted)
+                wanted_depth += wanted
+                continue
+
+            if open_wanted.pop():
+                wanted_depth -= 1
+                found[tag] = ''.join(elem.itertext())
+                if len(found) == len(tags):
+                    break
+            if wanted_depth == 0:
+                elem.clear()
+    return found
+
+# Tags read from each simulation file.
+SIM_TAGS = ['Name', 'Description', 'AlternativeName', 'AlternativePath', 'EventName', 'TimeWindowName', 'TimeWindowPath']
+# Typos are in the xml file: 'Structrue Inventory' and 'Agriculgure Duration Grid'
+ALT_WANTED_TAGS = ['Impact Area', 'Inundation Configuration', 'Structrue Inventory', 'Agriculture Inventory', 'Warning Issuance']
+# The GRID_WANTED_TAGS list comes from the gridlc xml file which is linked in the Alternative XML file.
+GRID_WANTED_TAGS = ['Inundation Grid', 'Depth Velocity Grid', 'Life Lose Arrival Grid', 'Agriculture Arrival Grid', 'Agriculgure Duration Grid']
+# Parameters from Alternative file
+PARAMETER_TAGS = ['Random Seed', 'Confidence', 'Convergence Tolerance', 'Convergence Variables', 'Evacuation Velocity']
+
+# Removing spaces from the tag and adding either 'Name' or 'Path', this matches the tag format in the xml file
+# doing this allows the formatting to be controlled by the wanted tag lists.
+# If more than spaces are needed, should update to use a dictionary of wantedFormattedName:XMLtagName pairs instead of the wanted tag lists.
+ALT_XML_TAGS = ['Description'] + [tag.replace(" ", "") + suffix for tag in ALT_WANTED_TAGS for suffix in ['Name', 'Path']] + [tag.replace(" ", "") for tag in PARAMETER_TAGS]
+GRID_XML_TAGS = [tag.replace(" ", "") + 'Path' for tag in GRID_WANTED_TAGS]
+
+# The number of simulations parsed at the same time. Parsing a simulation is mostly reading files, so threads are used.
+DEFAULT_SIM_WORKERS = 8
+
+def read_alternative_file(alt_file):
+    # Read the description, inventory, inundation configuration, and parameter tags from an Alternative file.
+    return read_xml_tags(alt_file, ALT_XML_TAGS)
+
+def read_gridslc_file(grids_file):
+    # Read the grid paths from a gridslc inundation configuration file.
+    return read_xml_tags(grids_file, GRID_XML_TAGS)
+
+def parse_timewindow_file(timewindow_file):
+    # Get the start and end times from a Time Window file.
+    with open(timewindow_file, 'r') as f:
+        lines = f.readlines()
 
-    with open(os.path.join(prj_dir, alt_path), 'r') as f:
-        alt_file = f.read()
+    lines = [s.strip('\n') for s in lines]
+    # get StartTime & EndTime line index
+    for i, v in enumerate(lines):
+        if 'FLD=m_startTime' in v:
+            startTime_idx = i + 1
+        if 'FLD=m_endTime' in v:
+            endTime_idx = i + 1
+    startTime_hecTime = lines[startTime_idx].split('=')[-1].split(',')[0]
+    startTime_utc= int(startTime_hecTime) * 24
+    startTime_dt = datetime.utcfromtimestamp(startTime_utc)
+    endTime_hecTime = lines[endTime_idx].split('=')[-1].split(',')[0]
+    endTime_utc= int(endTime_hecTime) * 24
+    endTime_dt = datetime.utcfromtimestamp(endTime_utc)
+    return startTime_dt, endTime_dt
+
+def list_subdirs(directory):
+    # List the subdirectories of a directory with os.scandir, sorted by name.
+    with os.scandir(directory) as entries:
+        return sorted([entry for entry in entries if entry.is_dir()], key=lambda entry: entry.name)
+
+def index_runs_dir(prj_dir):
+    """
+    Index the simulation result files in the project's runs/{Alternative}/{Event}/{Time Window} directories, in a single walk with os.scandir.
+    Each directory is listed once, so every simulation's result files are found without listing its directory again.
+    Returns a dictionary of {(alternative, event, time window): [{"name", "size"}]}, with the files sorted by name.
+    The keys are lower case, so they match the simulation's names without regard to case, like the Windows file system.
+    """
+    runs_index = {}
+    runs_dir = os.path.join(prj_dir, 'runs')
+    if not os.path.isdir(runs_dir):
+        print(f'No runs directory found: {runs_dir}')
+        return runs_index
+
+    for alt_entry in list_subdirs(runs_dir):
+        for event_entry in list_subdirs(alt_entry.path):
+            for timewindow_entry in list_subdirs(event_entry.path):
+                files = []
+                with os.scandir(timewindow_entry.path) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            files.append({'name': entry.name, 'size': entry.stat().st_size})
+                key = (alt_entry.name.lower(), event_entry.name.lower(), timewindow_entry.name.lower())
+                runs_index[key] = sorted(files, key=lambda f: f['name'])
+    return runs_index
+
+def get_result_summary_parameters(result_dir, result_files, summary_columns):
+    # Total the attribute columns matching summary_columns in each result shapefile's .dbf file, as simulation parameters.
+    # result_files are the simulation's files from the runs index. Returns a list of parameters.
+    dbf_names = {result_file['name'].lower(): result_file['name'] for result_file in result_files}
+    parameter_kv_list = []
+    for result_file in result_files:
+        layer, extension = os.path.splitext(result_file['name'])
+        if extension.lower() != '.shp':
+            continue
+        dbf_name = dbf_names.get(f'{layer}.dbf'.lower())
+        if dbf_name is None:
+            print(f'No .dbf file found for result shapefile: {os.path.join(result_dir, result_file["name"])}')
+            continue
 
-    soupData_alt = BeautifulSoup(alt_file, 'xml')
+        summary = dbf_summary.summarize_dbf(os.path.join(result_dir, dbf_name), summary_columns)
+        if summary is None:
+            continue
+        parameter_kv_list.append({
+            'value': summary['record_count'],
+            'parameter': f'{layer} Features'
+        })
+        for column, total in summary['totals'].items():
+            parameter_kv_list.append({
+                'value': total,
+                'parameter': f'{layer} {column} Total'
+            })
+    return parameter_kv_list
 
-    alt_description = soupData_alt.find_all('Description')[0].text
+def parse_sim(path, prj_dir, prj_name, sim_template_json, simulation_key_order, alt_cache, grid_cache, timewindow_cache, runs_index, summary_columns=None):
+    # Parse Sims from each sim file get basics and alt file. from alt file get inputs
+    # sim_template_json is the loaded simulation template, which is copied for each simulation.
+    # Many simulations share the same Alternative, gridslc, and Time Window files, so each is read once through the file caches.
+    # runs_index is the index of the project's result files from index_runs_dir.
+    # If summary_columns is given, the matching attribute columns of the result shapefiles are totaled as parameters.
+    # Returns the simulation name and the simulation json.
+    sim_tags = read_xml_tags(path, SIM_TAGS)
+    sim_name = sim_tags['Name']
+    sim_description = sim_tags['Description']
+    alt_name = sim_tags['AlternativeName']
+    alt_path = sim_tags['AlternativePath'].split("../")[-1]
+    event_name = sim_tags['EventName']
+    timewindow_name = sim_tags['TimeWindowName']
+    timewindow_path = sim_tags['TimeWindowPath'].split("../")[-1]
+
+    alt_tags = alt_cache.get(os.path.join(prj_dir, alt_path), read_alternative_file)
+
+    alt_description = alt_tags.get('Description')
 
-    
-    # Typos are in the xml file: 'Structrue Inventory' and 'Agriculgure Duration Grid'
-    wanted_tags = ['Impact Area', 'Inundation Configuration', 'Structrue Inventory', 'Agriculture Inventory', 'Warning Issuance']
-    # The grid_wanted_tags list comes from the gridlc xml file which is linked in the Alternative XML file.
-    grid_wanted_tags = ['Inundation Grid', 'Depth Velocity Grid', 'Life Lose Arrival Grid', 'Agriculture Arrival Grid', 'Agriculgure Duration Grid']
     alt_kv_list = []
 
-    for tag in wanted_tags:
+    for tag in ALT_WANTED_TAGS:
         
         try:
-            # Removing spaces from the tag and adding either 'Name' or 'Path', this matches the tag format in the xml file
-            # doing this allows the formatting to be controlled by the wanted_tags list. 
-            # If more than spaces are needed, should update to use a dictionary of wantedFormattedName:XMLtagName pairs instead of the wanted_tag list.
             tag_formatted = tag.replace(" ", "")
-            text_name = soupData_alt.find_all(tag_formatted+'Name')[0].text
-            text_path = soupData_alt.find_all(tag_formatted+'Path')[0].text
+            text_name = alt_tags[tag_formatted+'Name']
+            text_path = alt_tags[tag_formatted+'Path']
             
             if '../' in text_path:
                 text_path = text_path.split('../')[-1]
@@ -262,15 +387,12 @@ def parse_sims(sim_pathnames, prj_dir, prj_name, sim_template_json, output_dir,
             # Innundation Config input files
             if tag == 'Inundation Configuration':
 
-                # open gridslc file
-                with open(os.path.join(prj_dir, text_path), 'r') as f:
-                        grids_file = f.read()
-                
-                soupData_grids = BeautifulSoup(grids_file, 'xml')
+                # read the gridslc file
+                grid_tags = grid_cache.get(os.path.join(prj_dir, text_path), read_gridslc_file)
                 
-                for tag in grid_wanted_tags:
+                for tag in GRID_WANTED_TAGS:
                         tag_formatted = tag.replace(" ", "")
-                        text_path = soupData_grids.find_all(tag_formatted+'Path')[0].text
+                        text_path = grid_tags[tag_formatted+'Path']
                         
                         if '../' in text_path:
                             text_path = text_path.split('../')[-1]
@@ -286,30 +408,27 @@ def parse_sims(sim_pathnames, prj_dir, prj_name, sim_template_json, output_dir,
             print(f'Missing XML Tag. "<{tag_formatted}Path>" not found in Alternative File: "{os.path.join(prj_dir, alt_path)}"')
             continue
         
-    # outputs in dir: runs/{Alt}/{Event}/{TW}. Get *.shp's.
+    # outputs in dir: runs/{Alt}/{Event}/{TW}. Get *.shp's from the index of the runs directory.
     sim_results_dir = os.path.join('runs', alt_name, event_name, timewindow_name)
-    sim_results_abs_dir = os.path.join(prj_dir, 'runs', alt_name, event_name, timewindow_name)
+    sim_results_dir_forwardslash = sim_results_dir.replace("\\", "/")
     output_kv_list = []
-    for result_shp in glob.glob(rf'{sim_results_abs_dir}/*.shp'):
-        head, tail = os.path.split(result_shp)
-        sim_results_dir_forwardslash = sim_results_dir.replace("\\", "/")
+    result_files = runs_index.get((alt_name.lower(), event_name.lower(), timewindow_name.lower()), [])
+    for result_file in result_files:
+        tail = result_file['name']
+        if not tail.lower().endswith('.shp'):
+            continue
         output_kv_list.append({
-            'title': tail.split('.shp')[0],
+            'title': os.path.splitext(tail)[0],
             'source_dataset': None,
-            'description': tail.split('.shp')[0],
+            'description': os.path.splitext(tail)[0],
             'location': f'{sim_results_dir_forwardslash}/{tail}'
         })
 
-    # Parameters from Alternative file
-    parameter_tags = ['Random Seed', 'Confidence', 'Convergence Tolerance', 'Convergence Variables', 'Evacuation Velocity']
     parameter_kv_list = []
-    for tag in parameter_tags:
+    for tag in PARAMETER_TAGS:
         try:
-            # Removing spaces from the tag and adding either 'Name' or 'Path', this matches the tag format in the xml file
-            # doing this allows the formatting to be controlled by the wanted_tags list. 
-            # If more than spaces are needed, should update to use a dictionary of wantedFormattedName:XMLtagName pairs instead of the wanted_tag list.
             tag_formatted = tag.replace(" ", "")
-            text = soupData_alt.find_all(tag_formatted)[0].text
+            text = alt_tags[tag_formatted]
             parameter_kv_list.append({
                 'value': text,
                 'parameter': tag
@@ -318,27 +437,15 @@ def parse_sims(sim_pathnames, prj_dir, prj_name, sim_template_json, output_dir,
             print(f'Missing XML Tag. "<{tag_formatted}>" not found in Alternative File: "{os.path.join(prj_dir, alt_path)}"')
             continue
 
-    # Open Time Window File and Parse Temporal Extent
-    with open(os.path.join(prj_dir,timewindow_path), 'r') as f:
-        lines = f.readlines()
+    # Summarize the result shapefiles' attributes, without reading their geometry.
+    if summary_columns is not None:
+        parameter_kv_list.extend(get_result_summary_parameters(os.path.join(prj_dir, sim_results_dir), result_files, summary_columns))
 
-    lines = [s.strip('\n') for s in lines]
-    # get StartTime & EndTime line index
-    for i, v in enumerate(lines):
-        if 'FLD=m_startTime' in v:
-            startTime_idx = i + 1
-        if 'FLD=m_endTime' in v:
-            endTime_idx = i + 1
-    startTime_hecTime = lines[startTime_idx].split('=')[-1].split(',')[0]
-    startTime_utc= int(startTime_hecTime) * 24
-    startTime_dt = datetime.utcfromtimestamp(startTime_utc)
-    endTime_hecTime = lines[endTime_idx].split('=')[-1].split(',')[0]
-    endTime_utc= int(endTime_hecTime) * 24
-    endTime_dt = datetime.utcfromtimestamp(endTime_utc)
+    # Parse Temporal Extent from the Time Window File
+    startTime_dt, endTime_dt = timewindow_cache.get(os.path.join(prj_dir, timewindow_path), parse_timewindow_file)
 
-    # Open simulation template, drop unwanted keys, update values, output json.
-    with open(sim_template_json, 'r') as f:
-                sim_template_json = json.load(f)
+    # Copy simulation template, drop unwanted keys, update values.
+    sim_template_json = copy.deepcopy(sim_template_json)
 
     # keys to drop from json template
     drop_keys = ['_id', 'linked_resources', 'model_application', 'model_software',
@@ -354,15 +461,67 @@ def parse_sims(sim_pathnames, prj_dir, prj_name, sim_template_json, output_dir,
 
     # use key order to sort output json
     sim_template_json = {k: sim_template_json[k] for k in simulation_key_order if k in sim_template_json.keys()}
+    return sim_name, sim_template_json
 
-    # output sim json
+def try_parse_sim(path, *sim_args):
+    # Wrapper around parse_sim that returns the error instead of raising it, so one bad simulation does not stop the others.
+    # Returns a tuple of (simulation name, simulation json, error).
+    try:
+        return (*parse_sim(path, *sim_args), None)
+    except Exception:
+        return None, None, traceback.format_exc()
+
+def parse_sims(sim_pathnames, prj_dir, prj_name, sim_template_json, output_dir, simulation_key_order, workers=DEFAULT_SIM_WORKERS, summary_columns=None):
+    # Parse every simulation in the project file, in a pool of worker threads, or serially if workers is 1.
+    # If summary_columns is given, the matching attribute columns of each simulation's result shapefiles are totaled as parameters.
+    # Returns the simulation output file names, and a list of [simulation file, error] for each simulation that failed.
+    with open(sim_template_json, 'r') as f:
+        sim_template_json = json.load(f)
+    # The file caches are shared by the worker threads.
+    alt_cache = file_cache.FileCache('Alternative file')
+    grid_cache = file_cache.FileCache('Inundation configuration file')
+    timewindow_cache = file_cache.FileCache('Time window file')
+    # Index the result files of every simulation once.
+    runs_index = index_runs_dir(prj_dir)
+    sim_args = (prj_dir, prj_name, sim_template_json, simulation_key_order, alt_cache, grid_cache, timewindow_cache, runs_index, summary_columns)
+
+    if workers is None or workers <= 1:
+        sim_results = [try_parse_sim(path, *sim_args) for path in sim_pathnames]
+    else:
+        print(f'Parsing {len(sim_pathnames)} simulations using {workers} workers.')
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(try_parse_sim, path, *sim_args) for path in sim_pathnames]
+            sim_results = [future.result() for future in futures]
+    print(alt_cache.stats())
+    print(grid_cache.stats())
+    print(timewindow_cache.stats())
+
+    # output sim jsons, in the order of the project file so the output is deterministic.
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    output_sim_json = os.path.join(output_dir,f'{prj_name}_{sim_name}_simulation.json')
-    with open(output_sim_json, "w") as outfile:
-        json.dump(sim_template_json, outfile, indent=4)
-
-def parse(prj, shp, keywords, prj_id):
+    output_names = []
+    failed_sims = []
+    name_counts = {}
+    for path, (sim_name, sim_json, error) in zip(sim_pathnames, sim_results):
+        if error is not None:
+            failed_sims.append([path, error])
+            continue
+        # Simulations with the same name are numbered in project file order, so each one gets its own file.
+        name_counts[sim_name] = name_counts.get(sim_name, 0) + 1
+        if name_counts[sim_name] == 1:
+            output_sim_json_name = f'{prj_name}_{sim_name}_simulation.json'
+        else:
+            output_sim_json_name = f'{prj_name}_{sim_name}_{name_counts[sim_name]}_simulation.json'
+        with open(os.path.join(output_dir, output_sim_json_name), "w") as outfile:
+            json.dump(sim_json, outfile, indent=4)
+        output_names.append(output_sim_json_name)
+        print(output_sim_json_name)
+
+    for path, error in failed_sims:
+        print(f'\nError: Unable to parse simulation: {path}\n{error}')
+    return output_names, failed_sims
+
+def parse(prj, shp, keywords, prj_id, workers=DEFAULT_SIM_WORKERS, summary=False, summary_columns=None):
     try:
         prj_dir, prj_file_tail = os.path.split(prj)
         prj_name = prj_file_tail.split(".")[0]
@@ -377,11 +536,18 @@ def parse(prj, shp, keywords, prj_id):
 
         # Parse Project and return sim file paths
         sim_pathnames = parse_prj(prj, prj_dir, prj_name, prj_template_json, shp, output_dir, keywords, prj_id, model_application_key_order)
-        # Parse Sims
-        parse_sims(sim_pathnames, prj_dir, prj_name, sim_template_json, output_dir, simulation_key_order)
-
-        # Return Successful Output message
+        # Parse Sims. The result summary totals summary_columns, or the default columns if none are given.
+        if summary:
+            summary_columns = summary_columns if summary_columns is not None else dbf_summary.DEFAULT_SUMMARY_COLUMNS
+        else:
+            summary_columns = None
+        output_names, failed_sims = parse_sims(sim_pathnames, prj_dir, prj_name, sim_template_json, output_dir, simulation_key_order, workers, summary_columns)
+
+        # Return Successful Output message, with a warning for any simulations that failed.
         msg = f'FIA Parsing Complete. Output files located at: {output_dir}'
+        if len(failed_sims) > 0:
+            failed_paths = ', '.join([os.path.basename(path) for path, error in failed_sims])
+            msg = f'{msg}\nWarning: {len(failed_sims)} of {len(sim_pathnames)} simulations failed to parse: {failed_paths}'
         print('FIA Parsing Complete.')
         return msg
     except Exception: 
@@ -421,9 +587,31 @@ if __name__ == '__main__':
         type=str
     )
 
+    p.add_argument(
+        "--workers", help=f"Optional. The number of simulations parsed at the same time. Simulations are parsed serially if set to 1. (Default: {DEFAULT_SIM_WORKERS})",
+        required=False,
+        default=DEFAULT_SIM_WORKERS,
+        type=int
+    )
+
+    p.add_argument(
+        "--summary", help="Optional. Total the life loss, damage, and count columns of each simulation's result shapefiles as simulation parameters. \
+        Only the .dbf attribute table of each result shapefile is read.",
+        action="store_true"
+    )
+
+    p.add_argument(
+        "--summary_columns", help=f"Optional. Comma separated glob patterns of the result shapefile columns to total with --summary, matched without regard to case. \
+        (Default: '{', '.join(dbf_summary.DEFAULT_SUMMARY_COLUMNS)}')",
+        required=False,
+        type=str
+    )
+
     args = p.parse_args()
     args.keywords = args.keywords.split(",")
     args.keywords = [x.strip() for x in args.keywords]
+    if args.summary_columns is not None:
+        args.summary_columns = [x.strip() for x in args.summary_columns.split(",")]
 
-    msg = parse(args.fia, args.shp, args.keywords, args.id)
+    msg = parse(args.fia, args.shp, args.keywords, args.id, args.workers, args.summary, args.summary_columns)
     print(msg)
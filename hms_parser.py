@@ -1,15 +1,22 @@
 # HMS Parser - Parses metadata from an HMS project and the association simulations runs.
 # The files asscoaited with an HMS project are similar to a YAML but is invalid, so it is parsed by finding headers and pulling the wanted nested fields from each header
 
+import re
 import glob
 import copy
 import traceback
 import yaml, json
 import os
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from utils import get_wkt_crs
+from array import array
 from datetime import datetime
 from utils import get_schema_keys
+from utils import file_cache
+from utils import dss_index
+from utils import dss_catalog
+from utils import hms_results
 
 def replace_hms_characters(string, extension):
     """
@@ -19,95 +26,178 @@ def replace_hms_characters(string, extension):
     """
     return string.replace(" ","_").replace("(","_").replace(")","_").replace("-","_") + "." + extension
 
+def read_blocks(f):
+    """
+    Stream the blocks of an HMS file from an open file handle, one block at a time.
+    Each block starts with a "Header: Name" line, is followed by "Field: Value" lines, and ends with an unindented "End:" line.
+    Yields (header, name, fields) for each block, where fields is a dictionary of the first value of each field in the block.
+    """
+    header = None
+    for line in f:
+        line = line.rstrip()
+        if line == 'End:':
+            if header is not None:
+                yield header, name, fields
+            header = None
+            continue
+        if ':' not in line:
+            continue
+        key, value = line.split(':', 1)
+        key = key.strip()
+        value = value.strip()
+        if header is None:
+            header, name, fields = key, value, {}
+        elif key not in fields:
+            fields[key] = value
+
+def get_filename_field(fields):
+    # HMS writes the file name field of the project file as "Filename" or "FileName".
+    for key, value in fields.items():
+        if key.lower() == 'filename':
+            return value
+    return None
+
 def gage_file_parse(prj_dir, prj_name):
-    gage_kv ={}
+    # Build the gage inventory of a project from its .gage file: gage title -> {"Gage Type", "DSS File Name"}.
+    # Returns None if the project does not have a .gage file.
+    gage_index = {}
     # open the .gage file
     try:
-        with open(os.path.join(prj_dir,f'{prj_name}.gage'), 'r') as r:
-            gage_file = r.readlines()
-        gage_file = [s.strip('\n') for s in gage_file]
-        line_start = 0
-        gageList = []
-        for i,v in enumerate(gage_file):
-                if v == 'End:':
-                        # If not the beginning of the file, skip a blank line (+1) for the start of the subList.
-                        if len(gageList) > 0:
-                                gageList.append(gage_file[line_start+1:i])
-                        else:
-                                gageList.append(gage_file[line_start:i])
-                        line_start = i+1
-        
-        # For each gage in .gage file, Get gage type and associated dss file name.
-        gage_kv['Gage DSS Files'] ={}
-        for gage in gageList:
-            # get gage title
-            title = gage[0].split(":")[1].strip()
-            # Init ditionary for each gage title
-            gage_kv['Gage DSS Files'][title] = {}
-            # findList is used to search the wanted .gage file fields for each gage title.
-            findList = ["Gage Type", "DSS File Name"]
-            # search each gage for the keys in findList, append as key:value pairs for each gage title.
-            for find_key in findList:
-                found_value = [s for s in gage if find_key in s]
-                
-                # Omit blank fields by testing the length
-                if len(found_value) > 0:
-                    found_value = found_value[0].split(":")[1:][0].strip()
-                    
-                    gage_kv['Gage DSS Files'][title][find_key] = found_value
-
-            # Remove gage titles that did not contain the findList fields.
-            if len(gage_kv['Gage DSS Files'][title]) == 0:
-                del gage_kv['Gage DSS Files'][title]
-
-            # get values from dictionary in to a list without the keys.
-            temp_list = []
-            for key, value in gage_kv['Gage DSS Files'].items():
-                temp_list.append(value)
-
-        # Get a list of unique DSS File values in a list.
-        gage_dss_files = []
-        for t in temp_list:
-            gage_dss_files.append(t['DSS File Name'])
-        gage_dss_files = list(set(gage_dss_files))
-
-        # Create list in the format needed for the hms simulation json.
-        gage_dss_json_list = []
-        for dss_file in gage_dss_files:
-            for key, value in gage_kv['Gage DSS Files'].items():
-                # print (key, value)
-                if gage_kv['Gage DSS Files'][key]['DSS File Name'] == dss_file:
-                    gage_dss_json_list.append(
-                        {
-                            "title": gage_kv['Gage DSS Files'][key]['Gage Type'] + " DSS File",
-                            "source_dataset": None,
-                            "location": dss_file,
-                            "description": f"Parsed from {prj_name}.gage file"
-                        }
-                    )
-        # Remove duplicates from list
-        gage_dss_json_list = [dict(t) for t in {tuple(d.items()) for d in gage_dss_json_list}]
+        r = open(os.path.join(prj_dir,f'{prj_name}.gage'), 'r')
     except EnvironmentError:
         print(f"\nSetting Gage File to None. \n\
         (Some HMS Models do not have .gage files if there is no input timeseries or paired data). \n\
             File not found: \n\
                 {os.path.join(prj_dir,prj_name)}.gage\n")
-        gage_dss_json_list = None
+        return None
+
+    # For each gage in .gage file, Get gage type and associated dss file name.
+    # findList is used to search the wanted .gage file fields for each gage title.
+    findList = ["Gage Type", "DSS File Name"]
+    with r:
+        for header, title, gage in read_blocks(r):
+            if header != 'Gage':
+                continue
+            fields = {find_key: gage[find_key] for find_key in findList if find_key in gage}
+            # Omit gage titles that did not contain the findList fields.
+            if len(fields) > 0:
+                gage_index[title] = fields
+
+    return gage_index
+
+def get_dss_description(prj_dir, location, description, dss_cache):
+    # Add the DSS file's catalog summary (records, parameters, and date range) to a description.
+    # DSS file locations in HMS files are relative to the project directory. If the file cannot be read, the description is unchanged.
+    # dss_cache is None unless DSS catalogs are turned on, and then the description is unchanged too.
+    if dss_cache is None:
+        return description
+    dss_description = dss_catalog.describe_dss_file(os.path.join(prj_dir, location.replace('\\', '/')), dss_cache)
+    if dss_description is None:
+        return description
+    if description is None:
+        return dss_description
+    return f'{description}. {dss_description}'
+
+def get_gage_dss_files(gage_index, prj_dir, prj_name, dss_cache=None):
+    # Create the list of gage DSS files in the format needed for the hms json, with one entry per DSS file and gage type.
+    if gage_index is None:
+        return None
+
+    # Group the gage types by DSS file in a single pass. Dictionaries remove duplicates and keep the order of the .gage file.
+    dss_file_types = {}
+    for gage in gage_index.values():
+        # Gages entered manually in HMS do not have a DSS file.
+        if 'DSS File Name' not in gage:
+            continue
+        dss_file_types.setdefault(gage['DSS File Name'], {})[gage.get('Gage Type', 'Gage')] = None
+
+    gage_dss_json_list = []
+    for dss_file, gage_types in dss_file_types.items():
+        for gage_type in gage_types:
+            gage_dss_json_list.append(
+                {
+                    "title": gage_type + " DSS File",
+                    "source_dataset": None,
+                    "location": dss_file,
+                    "description": get_dss_description(prj_dir, dss_file, f"Parsed from {prj_name}.gage file", dss_cache)
+                }
+            )
 
     return gage_dss_json_list
 
-def get_extra_dss_files(input_dss_dir, prj_name, prj_parent_dir):
+def index_inventory_file(inventory_file, block_header, fields_wanted):
+    # Build an index of the records in a project's .grid or .pdata file in a single streaming pass: record name -> wanted fields.
+    # Returns None if the project does not have the file.
+    try:
+        f = open(inventory_file, 'r')
+    except EnvironmentError:
+        return None
+    inventory_index = {}
+    with f:
+        for header, name, fields in read_blocks(f):
+            if header == block_header:
+                inventory_index[name] = {key: fields[key] for key in fields_wanted if key in fields}
+    return inventory_index
+
+def index_grid_file(prj_dir, prj_name):
+    # Index the grids of the .grid file, such as gridded precipitation: grid name -> type, DSS file, and pathname of the default variant.
+    return index_inventory_file(os.path.join(prj_dir, f'{prj_name}.grid'), 'Grid', ['Grid Type', 'DSS File Name', 'DSS Pathname'])
+
+def index_pdata_file(prj_dir, prj_name):
+    # Index the paired data tables of the .pdata file, such as storage-outflow tables: table name -> type, DSS file, and pathname.
+    return index_inventory_file(os.path.join(prj_dir, f'{prj_name}.pdata'), 'Table', ['Table Type', 'DSS File', 'Pathname'])
+
+def get_referenced_input_files(grid_names, table_names, grid_index, pdata_index, prj_dir, prj_name, project_dss_file, dss_cache=None):
+    # Create the input file entries for the grids and paired data tables referenced by a simulation's met and basin models.
+    input_files = []
+    for name in grid_names:
+        grid = grid_index.get(name) if grid_index is not None else None
+        if grid is None or 'DSS File Name' not in grid:
+            print(f'Grid "{name}" not found in {prj_name}.grid file.')
+            continue
+        input_files.append(
+            {
+                "title": f"{grid.get('Grid Type', 'Grid')} Grid: {name}",
+                "source_dataset": None,
+                "location": grid['DSS File Name'],
+                "description": get_dss_description(prj_dir, grid['DSS File Name'], f"Parsed from {prj_name}.grid file. DSS Pathname: {grid.get('DSS Pathname')}", dss_cache)
+            }
+        )
+    for name in table_names:
+        table = pdata_index.get(name) if pdata_index is not None else None
+        if table is None:
+            print(f'Paired data table "{name}" not found in {prj_name}.pdata file.')
+            continue
+        # Tables without their own DSS file are stored in the project DSS file.
+        dss_file = table.get('DSS File', project_dss_file)
+        if dss_file is None:
+            continue
+        input_files.append(
+            {
+                "title": f"{table.get('Table Type', 'Paired Data')} Table: {name}",
+                "source_dataset": None,
+                "location": dss_file,
+                "description": get_dss_description(prj_dir, dss_file, f"Parsed from {prj_name}.pdata file. DSS Pathname: {table.get('Pathname')}", dss_cache)
+            }
+        )
+    return input_files
+
+def get_extra_dss_files(input_dss_dir, prj_name, prj_parent_dir, output_dir, dss_include=None, dss_exclude=None, dss_depth=None, dss_cache=None):
+    # Find the DSS files in the input dss directory and its subdirectories.
+    # The directory index is saved in the output directory so unchanged directories are not listed again on the next run.
     prj_parent_dir_head, prj_parent_dir_tail = os.path.split(prj_parent_dir)
+    dss_index_file = os.path.join(output_dir, f'{prj_name}_dss_index.json')
+    dss_files = dss_index.index_dss_files(input_dss_dir, dss_include, dss_exclude, dss_depth, dss_index_file)
     extra_dss_files_list = []
-    for dssFile in glob.glob(rf'{input_dss_dir}/*.dss'):
+    for dss_file in dss_files:
         # If the diss files are in the project directory or subdirectory, then use the relative path by removing the parent directory.
-        dssFile = dssFile.replace(prj_parent_dir_head, '').replace('\\', '/')
-        extra_dss_files_list.append(dssFile)    
+        dssFile = dss_file['path'].replace(prj_parent_dir_head, '').replace('\\', '/')
+        extra_dss_files_list.append([dssFile, dss_file['path']])
 
     # extra_dss_files_list
     dss_common_files_input = []
     if len(extra_dss_files_list)>0:
-        for f in extra_dss_files_list:
+        for f, dss_path in extra_dss_files_list:
             head, tail = os.path.split(f)
             dss_title = tail.split(".")[0]
             f = f.replace("\\", "/")
@@ -115,75 +205,56 @@ def get_extra_dss_files(input_dss_dir, prj_name, prj_parent_dir):
                 {
                         "title": dss_title,
                         "source_dataset": None,
-                        "description": "User Added from Input DSS File Directory",
+                        # dss_path already includes the input dss directory, so it is not joined to a base directory.
+                        "description": get_dss_description('', dss_path, "User Added from Input DSS File Directory", dss_cache),
                         "location": f,
                 },
             )
 
     return dss_common_files_input
 
-def parse_prj(prj, shp, wkt, crs, dss_common_files_input, output_dir, keywords, prj_id, model_application_key_order):
+def parse_prj(prj, shp, wkt, crs, dss_common_files_input, gage_dss_files, output_dir, keywords, prj_id, model_application_key_order):
 
     prj_dir, prj_file_tail = os.path.split(prj)
     prj_name = prj_file_tail.split(".")[0]
     # Get the prj_parent_dir tail to use as a relative path for the project file.
     prj_parent_dir_head, prj_parent_dir_tail = os.path.split(prj_dir)
     
-    try:
-        with open(prj, "r") as f:
-            lines = f.readlines()
-    except EnvironmentError: # parent of IOError, OSError *and* WindowsError where available
-        print (f'.HMS file not found: {prj}')
-
-    lines = [s.strip('\n') for s in lines]
-
-    # Break up the file in to headers and fields by using the keyword "End:" to define blocks of text.
-    nest_start = 0
-    nestList = []
-    for i,v in enumerate(lines):
-            if v == 'End:':
-                # If not the beginning of the file, skip a blank line (+1) for the start of the subList.
-                if len(nestList) > 0:
-                        nestList.append(lines[nest_start+1:i])
-                else:
-                        nestList.append(lines[nest_start:i])
-                nest_start = i+1
-
     # Create a dictionary based on keys using unique headers with fields of Title, Filename, and Description
     kv = {}
     kv['Control Files'] = {}
     kv['Basin'] = {}
     kv['Precipitaion'] = {}
-    
+
     # A list that defines which headers can be parsed the same way to obtain the wanted fields.
     headers_with_same_parsing = ['Control', 'Basin', 'Precipitation']
-    
-    # For each block of text as an item in nestList, parse headers and fields
-    for subList in nestList:
-        header = subList[0].split(":")[0]
-        title = subList[0].split(":")[1]
-        find_str = 'Description'
-        description = [s for s in subList if find_str in s][0].split(":")[1:][0].strip()
-
-        # The Project header is parsed differently from the headers in the list: headers_with_same_parsing
-        if header == 'Project':
-            find_str = 'File Name'
-            filename = [s for s in subList if find_str in s][0].split(":")[1:][0].strip()
-            kv['Project'] = {
-                'Title': title,
-                'Project Output DSS File': filename,
-                'Description': description
-            }
-    
-        # Search for any of the headers in headers_with_same_parsing and parse them.    
-        if any(header == i for i in headers_with_same_parsing):
-            find_str = 'filename'
-            filename = [s for s in subList if find_str in s.lower()][0].split(":")[1:][0].strip()
-            kv['Project'][title] = {
-                'File Name': filename,
-                'Description': description
-            }
-    
+
+    try:
+        f = open(prj, "r")
+    except EnvironmentError: # parent of IOError, OSError *and* WindowsError where available
+        print (f'.HMS file not found: {prj}')
+        raise
+
+    # For each block of the file, parse headers and fields
+    with f:
+        for header, title, fields in read_blocks(f):
+            description = fields.get('Description')
+
+            # The Project header is parsed differently from the headers in the list: headers_with_same_parsing
+            if header == 'Project':
+                kv['Project'] = {
+                    'Title': title,
+                    'Project Output DSS File': fields.get('DSS File Name'),
+                    'Description': description
+                }
+
+            # Search for any of the headers in headers_with_same_parsing and parse them.
+            if header in headers_with_same_parsing:
+                kv['Project'][title] = {
+                    'File Name': get_filename_field(fields),
+                    'Description': description
+                }
+
     # Add application_date from prj_file modified date
     modTimeUnix = os.path.getmtime(prj) 
     kv['application_date'] = datetime.fromtimestamp(modTimeUnix).strftime('%Y-%m-%d')
@@ -216,24 +287,27 @@ def parse_prj(prj, shp, wkt, crs, dss_common_files_input, output_dir, keywords,
     model_template_json['spatial_extent'] = wkt
 
 
-    # If the shp file is in the project directory or subdirectory, then use the relative path by removing the parent directory.
-    shp = shp.replace(prj_parent_dir_head, '').replace('\\', '/')
-
     model_template_json['common_input_files'] = []
-    model_template_json['common_input_files'].extend(
-        [{
+    model_template_json['common_input_files'].append(
+        {
             "title": "Project File",
             "source_dataset": None,
             "description": "The HMS Project File",
             "location": prj_file_tail,
-        },
-        {
-            "title": "Model Boundary File",
-            "source_dataset": None,
-            "description": f"The HMS Model Boundary File. Projection: {crs}",
-            "location": shp,
-        },
-        {
+        })
+    # Without a shp file, the spatial extent is from the basin geometry in the project files.
+    if shp is not None:
+        # If the shp file is in the project directory or subdirectory, then use the relative path by removing the parent directory.
+        shp = shp.replace(prj_parent_dir_head, '').replace('\\', '/')
+        model_template_json['common_input_files'].append(
+            {
+                "title": "Model Boundary File",
+                "source_dataset": None,
+                "description": f"The HMS Model Boundary File. Projection: {crs}",
+                "location": shp,
+            })
+    model_template_json['common_input_files'].extend(
+        [{
             "title": "Basin Files",
             "source_dataset": None,
             "description": "There may be multiple basins in the HMS model project",
@@ -257,10 +331,9 @@ def parse_prj(prj, shp, wkt, crs, dss_common_files_input, output_dir, keywords,
     if dss_common_files_input is not None:
         model_template_json['common_input_files'].extend(dss_common_files_input)
     
-    # open the .gage file and pull input dss files
-    gage_dss_files = gage_file_parse(prj_dir,prj_name)
+    # Add the input dss files from the .gage file
     if gage_dss_files is not None:
-        model_template_json['common_input_files'].extend(gage_dss_files)
+        model_template_json['common_input_files'].extend(copy.deepcopy(gage_dss_files))
 
     # use key order to sort output json
     model_template_json = {k: model_template_json[k] for k in model_application_key_order if k in model_template_json.keys()}
@@ -271,233 +344,390 @@ def parse_prj(prj, shp, wkt, crs, dss_common_files_input, output_dir, keywords,
         json.dump(model_template_json, outfile, indent=4)
     print (f'\nmodel_application file output to: {output_prj_json}')
 
-def parse_runs(prj, output_dir, simulation_key_order):
+def read_block_fields(file, block_header):
+    # Get the fields of the first block with the block_header in an HMS file, without reading the rest of the file.
+    # Returns an empty dictionary if the file has no block with the block_header.
+    with open(file, 'r') as f:
+        for header, name, fields in read_blocks(f):
+            if header == block_header:
+                return fields
+    return {}
+
+def add_references(fields, grid_names, table_names):
+    # Add the names of the grids and paired data tables referenced by the fields of a block, such as "Precip Grid Name" or "Storage Outflow Table".
+    # grid_names and table_names are dictionaries used as ordered sets.
+    for key, value in fields.items():
+        if len(value) == 0:
+            continue
+        if key.endswith('Grid Name'):
+            grid_names[value] = None
+        elif key.endswith(' Table'):
+            table_names[value] = None
+
+def parse_met_file(precip_file):
+    # Read the wanted fields from the Meteorology block of a .met file, and the grids and tables referenced by any block.
+    p_findList = ['Description', 'Precipitation Method']
+    grid_names = {}
+    table_names = {}
+    meteorology_fields = {}
+    with open(precip_file, 'r') as p:
+        for header, name, fields in read_blocks(p):
+            if header == 'Meteorology' and len(meteorology_fields) == 0:
+                meteorology_fields = fields
+            add_references(fields, grid_names, table_names)
+
+    met = {}
+    for p_find_key in p_findList:
+        if p_find_key not in meteorology_fields:
+            print (f'No {p_find_key} found in met file: {precip_file}. Setting Value to None.')
+        met[f'Meteorology {p_find_key}'] = meteorology_fields.get(p_find_key)
+    met['Meteorology Grid Names'] = list(grid_names)
+    met['Meteorology Table Names'] = list(table_names)
+    return met
+
+def parse_control_file(control_file):
+    # Read the wanted fields from the Control block of a .control file.
+    fields = read_block_fields(control_file, 'Control')
+    c_findList = ['Description', 'Start Date', 'End Date', 'Time Interval']
+
+    control = {}
+    for c_find_key in c_findList:
+        if c_find_key not in fields:
+            print (f'No {c_find_key} found in control file: {control_file}. Setting Value to None.')
+        control[f'Control {c_find_key}'] = fields.get(c_find_key)
+    return control
+
+# Element types in a .basin file, the element fields indexed for each element, and the method fields reported as simulation parameters.
+ELEMENT_TYPES = ['Subbasin', 'Reach', 'Junction', 'Reservoir', 'Sink', 'Source', 'Diversion']
+BASIN_METHODS = ['Canopy', 'LossRate', 'Transform', 'Baseflow', 'Route']
+ELEMENT_FIELDS = ['Downstream', 'Area', 'Canvas X', 'Canvas Y'] + BASIN_METHODS
+# Drainage area units for each basin Unit System.
+AREA_UNITS = {'English': 'sq mi', 'Metric': 'sq km'}
+
+def parse_basin_file(basin_file):
+    # Read the basin description and build an index of the basin elements in a single pass over a .basin file.
+    # Each element is indexed by name with its type, downstream element, area, canvas coordinates, and methods.
+    basin = {'Basin Description': None, 'Unit System': None, 'CRS': None, 'Elements': {}}
+    grid_names = {}
+    table_names = {}
+    with open(basin_file, 'r') as b:
+        for header, name, fields in read_blocks(b):
+            if header == 'Basin':
+                basin['Basin Description'] = fields.get('Description')
+                basin['Unit System'] = fields.get('Unit System')
+            elif header == 'Basin Spatial Properties':
+                # The coordinate system of the basin as WKT.
+                basin['CRS'] = fields.get('CRS Value')
+            elif header in ELEMENT_TYPES:
+                element = {'Type': header}
+                for key in ELEMENT_FIELDS:
+                    if key in fields:
+                        element[key] = fields[key]
+                basin['Elements'][name] = element
+                add_references(fields, grid_names, table_names)
+
+    basin['Grid Names'] = list(grid_names)
+    basin['Table Names'] = list(table_names)
+    # The outlets are the elements without a downstream element.
+    basin['Outlets'] = [name for name, element in basin['Elements'].items() if 'Downstream' not in element]
+    basin['parameters'] = get_basin_parameters(basin)
+    return basin
+
+def get_basin_parameters(basin):
+    # Put the basin methods, element counts, and total drainage area into the required Json format.
+    elements = basin['Elements'].values()
+    parameterList = []
+    # The methods used by the elements, without duplicates, in the order they are first used in the .basin file.
+    for key in BASIN_METHODS:
+        parameterList.append(
+            {
+                "parameter": key,
+                "value": list(dict.fromkeys([element[key] for element in elements if key in element]))
+            }
+        )
+
+    element_counts = {}
+    total_area = 0.0
+    for element in elements:
+        element_counts[element['Type']] = element_counts.get(element['Type'], 0) + 1
+        if element['Type'] == 'Subbasin' and 'Area' in element:
+            try:
+                total_area += float(element['Area'])
+            except ValueError:
+                pass
+
+    for element_type in ELEMENT_TYPES:
+        if element_type in element_counts:
+            parameterList.append(
+                {
+                    "parameter": f"{element_type} Elements",
+                    "value": element_counts[element_type]
+                }
+            )
+
+    if 'Subbasin' in element_counts:
+        area_units = AREA_UNITS.get(basin['Unit System'])
+        parameterList.append(
+            {
+                "parameter": f"Total Drainage Area ({area_units})" if area_units is not None else "Total Drainage Area",
+                "value": round(total_area, 2)
+            }
+        )
+    return parameterList
+
+# A line of a .geo or .map file with an "x, y" coordinate pair, optionally after a field name.
+COORDINATE_PATTERN = re.compile(r'^\s*(?:[^:]*:\s*)?(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)\s*,\s*(-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)\s*$')
+
+def read_geometry_coordinates(geometry_file):
+    # Stream the coordinate pairs of an HMS .geo or .map file, such as the points of each subbasin polygon.
+    # Returns a flat array of x, y values.
+    coordinates = array('d')
+    with open(geometry_file, 'r', errors='replace') as f:
+        for line in f:
+            match = COORDINATE_PATTERN.match(line)
+            if match is not None:
+                coordinates.extend((float(match.group(1)), float(match.group(2))))
+    return coordinates
+
+def get_basin_names(prj):
+    # Get the file names of the basin models in the Basin blocks of the .hms file.
+    with open(prj, 'r') as f:
+        return [replace_hms_characters(name, 'basin') for header, name, fields in read_blocks(f) if header == 'Basin']
+
+def get_model_extent(prj, prj_name, output_dir, basin_cache):
+    # Get the spatial extent of an HMS project from its own geometry, for projects without a boundary shapefile.
+    # The coordinates in the project's .geo and .map files are used if there are any, otherwise the canvas coordinates of the basin elements.
+    # The coordinate system is read from the basin files. Returns the same wkt and crs as get_wkt_crs.parse_shp.
+    prj_dir = os.path.dirname(prj)
+    crs_wkt = None
+    canvas_coordinates = array('d')
+    for basin_name in get_basin_names(prj):
+        try:
+            basin = basin_cache.get(os.path.join(prj_dir, basin_name), parse_basin_file, key=basin_name)
+        except EnvironmentError:
+            print(f'Basin file not found: {os.path.join(prj_dir, basin_name)}')
+            continue
+        if crs_wkt is None:
+            crs_wkt = basin['CRS']
+        for element in basin['Elements'].values():
+            try:
+                canvas_coordinates.extend((float(element['Canvas X']), float(element['Canvas Y'])))
+            except (KeyError, ValueError):
+                pass
+
+    geometry_files = sorted(glob.glob(os.path.join(glob.escape(prj_dir), '*.geo')) + glob.glob(os.path.join(glob.escape(prj_dir), '*.map')))
+    coordinates = array('d')
+    for geometry_file in geometry_files:
+        coordinates.extend(read_geometry_coordinates(geometry_file))
+
+    if len(coordinates) > 0:
+        print(f'No boundary file given. Using the extent of the coordinates in: {", ".join([os.path.split(f)[1] for f in geometry_files])}')
+    else:
+        print('No boundary file given. Using the extent of the basin element canvas coordinates.')
+        coordinates = canvas_coordinates
+    return get_wkt_crs.parse_coordinates(coordinates, crs_wkt, prj_name, output_dir)
+
+def write_simulation(title, sim, basin_name, precip_name, control_name, prj_name, gage_dss_files, output_dir, simulation_key_order):
+    # Write the simulation json for a single run from its parsed run, basin, met, and control fields.
+    # Returns the name of the output file.
+
+    # open the simulation Json template, del unnecessary keys, update, add, export
+    with open(r"example\input\json\hms_simulation.json", 'r') as f:
+                simulation_template_json = json.load(f)
+
+    # keys to drop from json template
+    drop_keys = ['_id', 'model_application', 'model_software', 'linked_resources','type']
+    for key in drop_keys:
+        del simulation_template_json[key]
+
+    simulation_template_json['description'] = f"Basin: {sim['Basin']}, {sim['Basin Description']}. \
+Meteorology: {sim['Precip']}, {sim['Meteorology Description']}. \
+Control: {sim['Control']}, {sim['Control Description']}."
+    simulation_template_json['title'] = f"{prj_name} HEC-HMS Simulation: {title}"
+    simulation_template_json['output_files'] = [
+        {
+            "title": "Output DSS File",
+            "source_dataset": None,
+            "description": sim['DSS File Description'],
+            "location": sim['DSS File'],
+        }
+    ]
+
+    # Each simulation gets its own copy of the project's gage dss files, or an empty list if the project has no .gage file.
+    simulation_template_json['input_files'] = copy.deepcopy(gage_dss_files) if gage_dss_files is not None else []
+    simulation_template_json['input_files'].extend(sim['Referenced Input Files'])
+
+    simulation_template_json['input_files'].extend([
+         {
+            "title": "Basin File",
+            "source_dataset": None,
+            "description": sim['Basin Description'],
+            "location": basin_name,
+        },
+        {
+            "title": "Meteorology File",
+            "source_dataset": None,
+            "description": sim['Meteorology Description'],
+            "location": precip_name,
+        },
+        {
+            "title": "Control File",
+            "source_dataset": None,
+            "description": sim['Control Description'],
+            "location": control_name,
+        },
+
+    ])
+    simulation_template_json['temporal_extent'] = [
+        datetime.strptime(sim['Control Start Date'], '%d  %B %Y').strftime('%Y-%m-%d'),
+        datetime.strptime(sim['Control End Date'], '%d  %B %Y').strftime('%Y-%m-%d')
+    ]
+
+    simulation_template_json["temporal_resolution"] = sim['Control Time Interval'] + ' Minutes'
+
+    # Add the summary of the run's results, if the results are newer than the run's control file.
+    if sim.get('Results File') is not None:
+        sim['parameters'].extend(hms_results.summarize_results_file(sim['Results File'], sim['Outlets']))
+
+    simulation_template_json["parameters"] = sim['parameters']
+
+    # use key order to sort output json
+    simulation_template_json = {k: simulation_template_json[k] for k in simulation_key_order if k in simulation_template_json.keys()}
+
+    # output each simulation json
+    output_sim_json_name = f'{prj_name}_{title}_simulation.json'
+    with open(os.path.join(output_dir, output_sim_json_name), "w") as outfile:
+        json.dump(simulation_template_json, outfile, indent=4)
+    return output_sim_json_name
+
+def get_results_file(prj_dir, title, control_file):
+    # Get the path of a run's results file, or None if it does not exist or is older than the run's control file.
+    results_file = os.path.join(prj_dir, 'results', replace_hms_characters(f'RUN_{title}', 'results'))
+    if not os.path.exists(results_file):
+        print(f'No results file found for run: {title}')
+        return None
+    if os.path.getmtime(results_file) < os.path.getmtime(control_file):
+        print(f'Results file is older than the control file for run: {title}. Skipping results.')
+        return None
+    return results_file
+
+def try_write_simulation(title, *run_args):
+    # Wrapper around write_simulation that returns the error instead of raising it, so one bad run does not abort the others.
+    # Returns a tuple of (title, output file name, error).
+    try:
+        return title, write_simulation(title, *run_args), None
+    except Exception:
+        return title, None, traceback.format_exc()
+
+def parse_runs(prj, gage_dss_files, output_dir, simulation_key_order, workers=None, dss_cache=None, basin_cache=None, grid_index=None, pdata_index=None, project_dss_file=None, results=False):
+    # Parse each run in the .run file as a simulation.
+    # The run, basin, met, and control files are read first, then if workers is greater than 1 the simulation jsons are written in a process pool, otherwise serially.
+    # If results is True, the run's results file is summarized when the simulation json is written.
+    # Returns the run titles in the order of the .run file, and a list of [run title, error] for each run that failed.
     # Get project name
     prj_dir, prj_file_tail = os.path.split(prj)
     prj_name = prj_file_tail.split(".")[0]
+    run_args = (prj_name, gage_dss_files, output_dir, simulation_key_order)
 
     # Open .run file
     run_file_name = os.path.join(prj_dir,f'{prj_name}.run')
     try:
-        with open(run_file_name, 'r') as r:
-            run_file = r.readlines()
+        r = open(run_file_name, 'r')
     except EnvironmentError:
         print (f'Run file not found: {run_file_name}')
-    run_file = [s.strip('\n') for s in run_file]
-
-    # Break run file into text blocks representing each Simulation as a list by the keyword "End:"
-    line_start = 0
-    runList = []
-    for i,v in enumerate(run_file):
-            if v == 'End:':
-                    # If not the beginning of the file, skip a blank line (+1) for the start of the subList.
-                    if len(runList) > 0:
-                            runList.append(run_file[line_start+1:i])
-                    else:
-                            runList.append(run_file[line_start:i])
-                    line_start = i+1
-    
-    # Parse each Simulation in the run file.
-    sim_kv = {}
-    for subList in runList:
-        title = subList[0].split(":")[1].strip()
-        # print(title)
-        sim_kv[title] = {}
-        # Create a list of fields to parse for each simulation.
-        findList = ['Basin', 'DSS File', 'Precip', 'Control']
-        for find_key in findList:
-            found_value = [s for s in subList if find_key in s][0].split(":")[1:][0].strip()
-            sim_kv[title][find_key] = found_value
-            
-            # Add data from each simulation's met file.
-            if find_key == 'Precip':
-                precip_name = replace_hms_characters(sim_kv[title][find_key], 'met')
+        raise
+
+    # Many runs share the same basin, met, and control models, so each model file is parsed once for all of the runs.
+    # The caches are keyed by the model file name on disk. The basin files may already have been read for the model extent.
+    met_cache = file_cache.FileCache('Meteorology file')
+    control_cache = file_cache.FileCache('Control file')
+    if basin_cache is None:
+        basin_cache = file_cache.FileCache('Basin file')
+
+    # Parse each Simulation in the run file, reading the run file one block at a time.
+    run_titles = []
+    run_results = {}
+    run_jobs = []
+    with r:
+        for header, title, fields in read_blocks(r):
+            if header != 'Run':
+                continue
+            run_titles.append(title)
+            try:
+                sim = {}
+                # Create a list of fields to parse for each simulation.
+                findList = ['Basin', 'DSS File', 'Precip', 'Control']
+                for find_key in findList:
+                    sim[find_key] = fields[find_key]
+                # Describe the run's output DSS file, if the run has been computed.
+                sim['DSS File Description'] = get_dss_description(prj_dir, sim['DSS File'], None, dss_cache)
+
+                # Add data from each simulation's met file.
+                precip_name = replace_hms_characters(sim['Precip'], 'met')
                 precip_file = os.path.join(prj_dir, precip_name)
-                
-                with open(precip_file, 'r') as p:
-                    p_file = p.readlines()
-                
-                p_file  = [s.strip('\n') for s in p_file]
-                p_findList = ['Description', 'Precipitation Method']
-                
-                for p_find_key in p_findList:
-                    try:
-                        found_value = [s for s in p_file if p_find_key in s][0].split(":")[1:][0].strip()
-                    except IndexError:
-                        print (f'No {p_find_key} found in met file: {precip_file}. Setting Value to None.')
-                        found_value = None
-
-                    sim_kv[title][f'Meteorology {p_find_key}'] = found_value
-                    # if not found, set to None
-                    if not f'Meteorology {p_find_key}' in sim_kv[title].keys():
-                          sim_kv[title][f'Meteorology {p_find_key}']= None
-                     
-            
-            # Add data from each simulation's control file.
-            if find_key == 'Control':
-                control_name = replace_hms_characters(sim_kv[title][find_key], 'control')
+                sim.update(met_cache.get(precip_file, parse_met_file, key=precip_name))
+
+                # Add data from each simulation's control file.
+                control_name = replace_hms_characters(sim['Control'], 'control')
                 control_file = os.path.join(prj_dir, control_name)
-                
-                with open(control_file, 'r') as c:
-                    c_file = c.readlines()
-                
-                c_file  = [s.strip('\n') for s in c_file]
-                c_findList = ['Description', 'Start Date', 'End Date', 'Time Interval']
-                
-                for c_find_key in c_findList:
-                    try:
-                        found_value = [s for s in c_file if c_find_key in s][0].split(":")[1:][0].strip()
-                    except IndexError:
-                        print (f'No {c_find_key} found in control file: {control_file}. Setting Value to None.')
-                        found_value = None
-                        
-                    sim_kv[title][f'Control {c_find_key}'] = found_value
-                    # if not found, set to None
-                    if not f'Control {p_find_key}' in sim_kv[title].keys():
-                          sim_kv[title][f'Control {p_find_key}']= None
-
-            # Add data from each simulations's basin file
-            parameterList = []
-            if find_key == 'Basin':
-                basin_name = replace_hms_characters(sim_kv[title][find_key], 'basin')
-                basin_file = os.path.join(prj_dir, basin_name)
+                sim.update(control_cache.get(control_file, parse_control_file, key=control_name))
 
-                with open(basin_file, 'r') as b:
-                    b_file = b.readlines()
-                # print (b_file)
-                b_file  = [s.strip('\n') for s in b_file]
-
-                line_start = 0
-                basinList = []
-                # print (b_file)
-                for i,v in enumerate(b_file):
-                    # print (v + '\n')
-                    # if (v == 'Basin:'):
-                         
-                    if (v == 'End:'):
-                        # print(i, v)
-                        # If not the beginning of the file, skip a blank line (+1) for the start of the subList.
-                        if len(basinList) > 0:
-                                basinList.append(b_file[line_start+1:i])
-                        else:
-                                basinList.append(b_file[line_start:i])
-                        line_start = i+1
-
-                # find basin description
-                for i, v in enumerate(basinList):
-                    if ('Basin: ') in v[0]:
-                        basinblock_index = i
-                for basinblock_line in basinList[basinblock_index]:
-                    if 'Description: ' in basinblock_line:
-                        basin_description = basinblock_line.split('Description: ')[-1]
-                        sim_kv[title]['Basin Description'] = basin_description  
-                    else:                         
-                    # if not found, set to None
-                        sim_kv[title]['Basin Description']= None      
-                                
-                # List of Parameters to look for in each .basin file. Each Parameter will be added as a key to a temporary dictionary before formatting.
-                b_findList = ['Canopy', 'LossRate', 'Transform', 'Baseflow', 'Route']
-                params = {}
-                # initialize empty lists for each parameter key
-                for key in b_findList:
-                        params[key] = []
-                # For each line of each element block in a .basin file, look for each parameter (key) in b_findList 
-                for el in basinList:
-                    for line in el:
-                        for key in b_findList:
-                            
-                            if f'{key}: ' in line:
-                                # Append the parameter values to the parameter dictionary
-                                params[key].append(line.split(': ')[-1])   
-                            
-                            # remove duplicates from each key's list of values
-                            params[key] = list(set(params[key]))
-
-                # Put parameters dictionary into the required Json format and add to kv dictionary for each run title.    
-                for key in params.keys():
-                    parameterList.append(
-                        {
-                            "parameter": key,
-                            "value": params[key]
-                        }
+                # Add data from each simulations's basin file.
+                basin_name = replace_hms_characters(sim['Basin'], 'basin')
+                basin_file = os.path.join(prj_dir, basin_name)
+                basin = basin_cache.get(basin_file, parse_basin_file, key=basin_name)
+                sim['Basin Description'] = basin['Basin Description']
+                # Copy the cached parameters, since the simulation's own parameters are added to the list.
+                sim['parameters'] = copy.deepcopy(basin['parameters'])
+
+                sim['parameters'].append(
+                            {
+                            "parameter": 'Precipitation Method',
+                            "value": sim['Meteorology Precipitation Method']
+                            }
                     )
-            
-                sim_kv[title]['parameters'] = parameterList
-        
-        sim_kv[title]['parameters'].append(
-                    {
-                    "parameter": 'Precipitation Method',
-                    "value": sim_kv[title]['Meteorology Precipitation Method']
-                    }
-            )
-        # open the simulation Json template, del unnecessary keys, update, add, export 
-        with open(r"example\input\json\hms_simulation.json", 'r') as f:
-                    simulation_template_json = json.load(f)
-
-        # keys to drop from json template
-        drop_keys = ['_id', 'model_application', 'model_software', 'linked_resources','type']
-        for key in drop_keys:
-            del simulation_template_json[key]
-
-        simulation_template_json['description'] = f"Basin: {sim_kv[title]['Basin']}, {sim_kv[title]['Basin Description']}. \
-Meteorology: {sim_kv[title]['Precip']}, {sim_kv[title]['Meteorology Description']}. \
-Control: {sim_kv[title]['Control']}, {sim_kv[title]['Control Description']}."
-        simulation_template_json['title'] = f"{prj_name} HEC-HMS Simulation: {title}"
-        simulation_template_json['output_files'] = [
-            {
-                "title": "Output DSS File",
-                "source_dataset": None,
-                "description": None,
-                "location": sim_kv[title]['DSS File'],
-            }
-        ]
-        
-        simulation_template_json['input_files'] = gage_file_parse(prj_dir, prj_name)
-        # initiate simulation_template_json['input_files'] as empty list if gage_file_parse returns None.
-        if simulation_template_json['input_files'] is None:
-             simulation_template_json['input_files'] = []
-        
-        simulation_template_json['input_files'].extend([
-             {
-                "title": "Basin File",
-                "source_dataset": None,
-                "description": sim_kv[title]['Basin Description'],
-                "location": basin_name,
-            },
-            {
-                "title": "Meteorology File",
-                "source_dataset": None,
-                "description": sim_kv[title]['Meteorology Description'],
-                "location": precip_name,
-            },
-            {
-                "title": "Control File",
-                "source_dataset": None,
-                "description": sim_kv[title]['Control Description'],
-                "location": control_name,
-            },
-
-        ])
-        simulation_template_json['temporal_extent'] = [
-            datetime.strptime(sim_kv[title]['Control Start Date'], '%d  %B %Y').strftime('%Y-%m-%d'),
-            datetime.strptime(sim_kv[title]['Control End Date'], '%d  %B %Y').strftime('%Y-%m-%d')
-        ]
-    
-        simulation_template_json["temporal_resolution"] = sim_kv[title]['Control Time Interval'] + ' Minutes'
-
-        simulation_template_json["parameters"] = sim_kv[title]['parameters']    
-
-        # use key order to sort output json
-        simulation_template_json = {k: simulation_template_json[k] for k in simulation_key_order if k in simulation_template_json.keys()}
-
-        # output each simulation json
-        output_sim_json = os.path.join(output_dir,f'{prj_name}_{title}_simulation.json')
-        with open(output_sim_json, "w") as outfile:
-            json.dump(simulation_template_json, outfile, indent=4)
-        print (f'{prj_name}_{title}_simulation.json')
 
-
-def parse(prj, shp, dss, keywords, prj_id):
+                # Add only the grids and paired data tables that the run's met and basin models reference.
+                grid_names = list(dict.fromkeys(sim['Meteorology Grid Names'] + basin['Grid Names']))
+                table_names = list(dict.fromkeys(sim['Meteorology Table Names'] + basin['Table Names']))
+                sim['Referenced Input Files'] = get_referenced_input_files(grid_names, table_names, grid_index, pdata_index, prj_dir, prj_name, project_dss_file, dss_cache)
+
+                # Only summarize results computed after the run's control file was last changed, since older results are stale.
+                if results:
+                    sim['Results File'] = get_results_file(prj_dir, title, control_file)
+                    sim['Outlets'] = basin['Outlets']
+                run_jobs.append([title, sim, basin_name, precip_name, control_name])
+            except Exception:
+                run_results[title] = (title, None, traceback.format_exc())
+
+    print(met_cache.stats())
+    print(control_cache.stats())
+    print(basin_cache.stats())
+
+    if workers is None or workers <= 1:
+        for job in run_jobs:
+            run_results[job[0]] = try_write_simulation(*job, *run_args)
+    else:
+        print(f'Writing {len(run_jobs)} simulations using {workers} workers.')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(try_write_simulation, *job, *run_args) for job in run_jobs]
+            for future in futures:
+                title, output_sim_json_name, error = future.result()
+                run_results[title] = (title, output_sim_json_name, error)
+
+    # Report the output files and failed runs in the order of the .run file so the output is deterministic.
+    failed_runs = []
+    for title, output_sim_json_name, error in [run_results[title] for title in run_titles]:
+        if error is not None:
+            failed_runs.append([title, error])
+            continue
+        print (output_sim_json_name)
+    for title, error in failed_runs:
+        print(f'\nError: Unable to parse run: {title}\n{error}')
+
+    return run_titles, failed_runs
+
+def parse(prj, shp, dss, keywords, prj_id, workers=None, dss_include=None, dss_exclude=None, dss_depth=None, results=False, dss_catalogs=False):
     try:
         # Get project name
         prj_dir, prj_file_tail = os.path.split(prj)
@@ -512,13 +742,21 @@ def parse(prj, shp, dss, keywords, prj_id):
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-        # Get WKT and CRS from shp
-        prj_wkt = None
-        wkt, crs = get_wkt_crs.parse_shp(shp, prj_wkt, prj_name, output_dir)
+        # Get WKT and CRS from shp, or from the basin geometry if there is no shp.
+        basin_cache = file_cache.FileCache('Basin file')
+        if shp is not None:
+            prj_wkt = None
+            wkt, crs = get_wkt_crs.parse_shp(shp, prj_wkt, prj_name, output_dir)
+        else:
+            wkt, crs = get_model_extent(prj, prj_name, output_dir, basin_cache)
+
+        # If dss_catalogs is True, DSS file descriptions include a summary of the file's catalog.
+        # DSS catalog summaries are cached in the output directory between runs, keyed by the DSS file path, size, and modified time.
+        dss_cache = file_cache.DiskCache('DSS catalog', os.path.join(output_dir, f'{prj_name}_dss_catalog_cache.json')) if dss_catalogs else None
 
         # if args.dss, get dss input files
         if dss is not None:
-            extra_dss_files_list = get_extra_dss_files(dss, prj_name, prj_parent_dir)
+            extra_dss_files_list = get_extra_dss_files(dss, prj_name, prj_parent_dir, output_dir, dss_include, dss_exclude, dss_depth, dss_cache)
         else:
             extra_dss_files_list = None
         
@@ -526,14 +764,30 @@ def parse(prj, shp, dss, keywords, prj_id):
         model_application_key_order = get_schema_keys.get_schema_keys("./example/input/json/model_application_schema.json")
         simulation_key_order = get_schema_keys.get_schema_keys("./example/input/json/simulation_schema.json")  
 
+        # Parse the .gage file once, for the model application and every simulation.
+        gage_index = gage_file_parse(prj_dir, prj_name)
+        gage_dss_files = get_gage_dss_files(gage_index, prj_dir, prj_name, dss_cache)
+
         # Parse project file
-        parse_prj(prj, shp, wkt, crs, extra_dss_files_list, output_dir, keywords, prj_id, model_application_key_order)
+        parse_prj(prj, shp, wkt, crs, extra_dss_files_list, gage_dss_files, output_dir, keywords, prj_id, model_application_key_order)
+
+        # Index the project's grids and paired data tables once, for every simulation.
+        grid_index = index_grid_file(prj_dir, prj_name)
+        pdata_index = index_pdata_file(prj_dir, prj_name)
+        project_dss_file = read_block_fields(prj, 'Project').get('DSS File Name')
 
         # Run file parse
-        parse_runs(prj, output_dir, simulation_key_order)
+        run_titles, failed_runs = parse_runs(prj, gage_dss_files, output_dir, simulation_key_order, workers, dss_cache, basin_cache,
+                                             grid_index, pdata_index, project_dss_file, results)
+        if dss_cache is not None:
+            print(dss_cache.stats())
+            dss_cache.save()
 
-        # Return Successful Output message.
+        # Return Successful Output message, with a warning for any runs that failed.
         msg = f'HMS Parsing Complete. Output files located at: {output_dir}'
+        if len(failed_runs) > 0:
+            failed_titles = ', '.join([title for title, error in failed_runs])
+            msg = f'{msg}\nWarning: {len(failed_runs)} of {len(run_titles)} runs failed to parse: {failed_titles}'
         return msg
     
     except Exception: 
@@ -553,9 +807,10 @@ if __name__ == '__main__':
     )
 
     p.add_argument(
-    "--shp", help="The HEC-HMS model boundary spatial extent as an ESRI shapefile or GeoJson. \
+    "--shp", help="Optional. The HEC-HMS model boundary spatial extent as an ESRI shapefile or GeoJson. \
+        If not given, the extent is taken from the project's .geo and .map files or the basin element coordinates. \
         (Ex: C:\HMS_Models\Amite\maps\Amite_HMS_Basin_Outline.shp)", 
-    required=True, 
+    required=False, 
     type=str
     )
 
@@ -579,8 +834,51 @@ if __name__ == '__main__':
         type=str
     )
 
+    p.add_argument(
+        "--workers", help="Optional. The number of worker processes used to write simulation files in parallel. \
+        Runs are written serially if not set or set to 1. (Ex: 4)",
+        required=False,
+        type=int
+    )
+
+    p.add_argument(
+        "--dss_include", help="Optional. Comma separated glob patterns of the files to include from the --dss directory and its subdirectories. (Default: *.dss)",
+        required=False,
+        type=str
+    )
+
+    p.add_argument(
+        "--dss_exclude", help="Optional. Comma separated glob patterns of files or directories to skip in the --dss directory, matched against names or relative paths. \
+        (Ex: 'archive, *_old.dss')",
+        required=False,
+        type=str
+    )
+
+    p.add_argument(
+        "--dss_depth", help="Optional. The number of subdirectory levels of the --dss directory to search. 0 searches only the --dss directory. Defaults to all levels. (Ex: 2)",
+        required=False,
+        type=int
+    )
+
+    p.add_argument(
+        "--results", help="Optional. Summarize each run's results file (results/RUN_<run name>.results) as simulation parameters, \
+        such as the outlet peak flow, time of peak, and volume. Results older than the run's control file are skipped.",
+        action="store_true"
+    )
+
+    p.add_argument(
+        "--dss_catalog", help="Optional. Add a summary of each DSS file's catalog, its record count, parameters, and date range, \
+        to the DSS file descriptions. Only the first 64 MB of each DSS file is searched for record pathnames.",
+        action="store_true"
+    )
+
     args = p.parse_args()
     args.keywords = args.keywords.split(",")
     args.keywords = [x.strip() for x in args.keywords]
+    # Split the dss pattern arguments into lists
+    if args.dss_include is not None:
+        args.dss_include = [x.strip() for x in args.dss_include.split(",")]
+    if args.dss_exclude is not None:
+        args.dss_exclude = [x.strip() for x in args.dss_exclude.split(",")]
     
-    parse(args.hms, args.shp, args.dss, args.keywords, args.id)
\ No newline at end of file
+    parse(args.hms, args.shp, args.dss, args.keywords, args.id, args.workers, args.dss_include, args.dss_exclude, args.dss_depth, args.results, args.dss_catalog)
\ No newline at end of file
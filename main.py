@@ -153,7 +153,8 @@ def parse_hms():
                     messagebox.showinfo(
                         title='HMS', message=f"HMS Project File must be a .hms file")
                     return
-            if key == "shp":
+            # The HMS boundary file is optional. Without it the extent is taken from the HMS project's basin geometry.
+            if key == "shp" and val != '':
                 if not val.endswith(".shp") and not val.endswith(".geojson") and not val.endswith(".json"):
                     messagebox.showinfo(
                         title='HMS', message=f"HMS Boundary Outline Shape File must be an ESRI Shape or Geojson file (.shp, .geojson, .json)")
@@ -166,6 +167,8 @@ def parse_hms():
                     return
     args.keywords = args.keywords.split(",")
     args.keywords = [x.strip() for x in args.keywords]
+    if args.shp == '':
+        args.shp = None
     print("\nParsing HMS..")
     msg = hms_parser.parse(args.prj, args.shp, args.dss, args.keywords, args.id)
     print(msg)
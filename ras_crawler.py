@@ -0,0 +1,182 @@
+# RAS Crawler - Finds every HEC-RAS project in a directory tree and extracts the metadata of each with ras_parser.
+# RAS project files and shapefile projection files share the .prj extension, so RAS projects are told apart by their content.
+
+import os
+import glob
+import json
+import time
+import argparse
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+import ras_parser
+
+# Glob patterns, relative to the project directory, used to find a project's boundary file. The first pattern with a match is used.
+# {prj_name} is replaced with the project name.
+DEFAULT_BOUNDARY_PATTERNS = ['{prj_name}*.shp', '{prj_name}*.geojson', 'Features/*.shp', 'Features/*.geojson', 'Shapes/*.shp']
+
+def is_ras_prj(prj_file):
+    # RAS project files always start with the project title. Shapefile .prj files start with the WKT projection.
+    try:
+        with open(prj_file, 'r', errors='replace') as f:
+            head = f.read(256)
+    except OSError:
+        return False
+    return head.lstrip().startswith('Proj Title=')
+
+def discover_ras_projects(root_dir):
+    # Walk the directory tree with os.scandir and return the sorted list of RAS project files.
+    # Every .prj file is sniffed with is_ras_prj, since a RAS project can have a boundary shapefile of the same name.
+    prj_files = []
+    dirs = [root_dir]
+    while len(dirs) > 0:
+        current_dir = dirs.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                entries = list(entries)
+        except OSError:
+            print(f'Unable to read directory: {current_dir}')
+            continue
+
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() == '.prj' and is_ras_prj(entry.path):
+                prj_files.append(entry.path)
+
+    return sorted(prj_files)
+
+def find_boundary(prj_file, boundary_patterns):
+    # Get the boundary file for a project using the first of the boundary_patterns with a match. Returns None if none match.
+    prj_dir, prj_file_tail = os.path.split(prj_file)
+    prj_name = '.'.join(prj_file_tail.split(".")[:-1])
+    for pattern in boundary_patterns:
+        matches = sorted(glob.glob(os.path.join(glob.escape(prj_dir), pattern.format(prj_name=glob.escape(prj_name)))))
+        if len(matches) > 0:
+            return matches[0]
+    return None
+
+def extract_project(prj_file, shp_file, output_dir, keywords, prj_id, force):
+    # Extract a single RAS project with ras_parser, and time it.
+    args = Namespace(prj=prj_file, shp=shp_file, output_dir=output_dir, keywords=keywords, id=prj_id, force=force)
+    start_time = time.perf_counter()
+    try:
+        msg = ras_parser.parse(args)
+    except Exception as e:
+        msg = str(e)
+    seconds = round(time.perf_counter() - start_time, 2)
+    status = 'Success' if msg is not None and msg.startswith('RAS Parsing Complete') else 'Failed'
+    return {
+        'Project File': prj_file,
+        'Boundary File': shp_file,
+        'Output Directory': output_dir,
+        'Status': status,
+        'Seconds': seconds,
+        'Message': msg,
+    }
+
+def crawl(root_dir, boundary_patterns=None, workers=None, keywords=None, prj_id=None, force=False):
+    # Find and extract every RAS project under root_dir, using a pool of worker processes.
+    # Returns the summary of successes, failures, and timings, and writes it to output/ras/crawl_summary.json.
+    if boundary_patterns is None:
+        boundary_patterns = DEFAULT_BOUNDARY_PATTERNS
+
+    start_time = time.perf_counter()
+    prj_files = discover_ras_projects(root_dir)
+    print(f'Found {len(prj_files)} RAS projects in {root_dir} in {round(time.perf_counter() - start_time, 2)} seconds.')
+
+    # Output directories mirror the directory tree, so projects with the same name in different directories do not overwrite each other.
+    output_root = os.path.join(os.getcwd(), 'output', 'ras')
+    results = []
+    jobs = []
+    for prj_file in prj_files:
+        shp_file = find_boundary(prj_file, boundary_patterns)
+        if shp_file is None:
+            results.append({
+                'Project File': prj_file,
+                'Boundary File': None,
+                'Output Directory': None,
+                'Status': 'Failed',
+                'Seconds': 0,
+                'Message': f'No boundary file found matching: {", ".join(boundary_patterns)}',
+            })
+        else:
+            prj_dir, prj_file_tail = os.path.split(prj_file)
+            prj_name = '.'.join(prj_file_tail.split(".")[:-1])
+            output_dir = os.path.normpath(os.path.join(output_root, os.path.relpath(prj_dir, root_dir), prj_name))
+            jobs.append([prj_file, shp_file, output_dir, keywords, prj_id, force])
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(extract_project, *job) for job in jobs]
+        for future in futures:
+            results.append(future.result())
+
+    results = sorted(results, key=lambda result: result['Project File'])
+    summary = {
+        'Root Directory': root_dir,
+        'Projects Found': len(prj_files),
+        'Succeeded': len([result for result in results if result['Status'] == 'Success']),
+        'Failed': len([result for result in results if result['Status'] == 'Failed']),
+        'Seconds': round(time.perf_counter() - start_time, 2),
+        'Projects': results,
+    }
+
+    # Print and output the summary.
+    for result in results:
+        print(f"{result['Status']}: {result['Project File']} ({result['Seconds']} s)")
+    print(f"\nRAS Crawl Complete. {summary['Succeeded']} succeeded, {summary['Failed']} failed, in {summary['Seconds']} seconds.")
+
+    if not os.path.exists(output_root):
+        os.makedirs(output_root)
+    output_summary_json = os.path.join(output_root, 'crawl_summary.json')
+    with open(output_summary_json, 'w') as outfile:
+        json.dump(summary, outfile, indent=4)
+    print(f'Summary output to: {output_summary_json}')
+
+    return summary
+
+if __name__ == '__main__':
+    # Parse Command Line Arguments
+    p = argparse.ArgumentParser(description="HEC-RAS metadata extraction for every RAS project in a directory tree. \
+        Each project is paired with a boundary file found next to it.")
+
+    p.add_argument(
+        "--root", help="The directory to search for HEC-RAS project files. (Ex: C:\RAS_Models)",
+        required=True,
+        type=str
+    )
+    p.add_argument(
+        "--boundary", help=f"Optional. Comma separated glob patterns, relative to each project directory, used to find the project's boundary file. \
+        The first pattern with a match is used, and {{prj_name}} is replaced with the project name. (Default: {','.join(DEFAULT_BOUNDARY_PATTERNS)})",
+        required=False,
+        type=str
+    )
+    p.add_argument(
+        "--workers", help="Optional. The number of projects to extract at the same time. Defaults to the number of CPUs. (Ex: 4)",
+        required=False,
+        type=int
+    )
+    p.add_argument(
+        '--keywords', help='Optional. Additional Keywords for the projects such as the client. Add multiple keywords with a comma (Ex: "LWI, National Park Service, CPRA")',
+        required=False,
+        type=str
+    )
+    p.add_argument(
+        "--id", help="The Internal Organizational Project ID. This is ussually specifc to your own organization or company. \
+        (Ex: P00813)",
+        required=False,
+        type=str
+    )
+    p.add_argument(
+        "--force", help="Optional. Re-extract every plan file, even if its files are unchanged since the last run.",
+        action="store_true"
+    )
+
+    args = p.parse_args()
+
+    # Split keywords and boundary arguments into lists
+    if args.keywords is not None:
+        args.keywords = [x.strip() for x in args.keywords.split(",")]
+    if args.boundary is not None:
+        args.boundary = [x.strip() for x in args.boundary.split(",")]
+
+    crawl(args.root, args.boundary, args.workers, args.keywords, args.id, args.force)
@@ -4,41 +4,146 @@ import traceback
 import yaml
 import json
 import os
+import mmap
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-import h5py
-from utils import get_wkt_crs, trimmer, get_schema_keys
+from utils import get_wkt_crs, trimmer, get_schema_keys, file_cache, ras_hdf, dss_catalog
 
 
-def get_ras_prj_wkt(p_file):
-    # Open a plan hdf file, get WKT from it.
+def get_ras_prj_wkt(p_file, hdf_cache):
+    # Get WKT from a plan hdf file's metadata, read through hdf_cache so the file is only opened if it changed.
     try:
-        with h5py.File(f'{p_file}.hdf', "r") as f:
-            ras_prj_wkt = f.attrs['Projection'].decode('UTF-8')
-            # print (f'Extracted spatial projection from HDF: {ras_prj_wkt}')
+        ras_prj_wkt = hdf_cache.get(f'{p_file}.hdf', ras_hdf.read_plan_hdf_meta)['Projection']
+        # print (f'Extracted spatial projection from HDF: {ras_prj_wkt}')
     except:
+        ras_prj_wkt = None
+
+    if ras_prj_wkt is None:
         print(f'''
                Unable to extract spatial projection from HDF plan file:
                {p_file}.hdf
                May have to manually specify .shp projection using a GIS.''')
-        ras_prj_wkt = None
 
     return ras_prj_wkt
 
 
-def getDSSPaths(lines):
-    # Get lines with 'DSS Filename'
-    dss_file_lines = [[i, v] for i, v in enumerate(lines) if "DSS File" in v]
-
-    # Get dss pathnames for each dss_file_line
-    dss_file_and_paths = []
-    for dss_file_line in dss_file_lines:
-        # The line in the u file with a dss pathname is always +1 lines from the line specifying the DSS File.
-        dss_pathname = lines[dss_file_line[0]+1]
-        # Create a list of lists containing just the [[DSS Files, DSS Pathnames]]
-        dss_file_and_paths.append([dss_file_line[1], dss_pathname])
-
-    return dss_file_and_paths
+# Keys in a .u## file that set the type of the current boundary condition, mapped to the boundary condition type.
+BC_TYPES = {
+    'Flow Hydrograph': 'Flow Hydrograph',
+    'Stage Hydrograph': 'Stage Hydrograph',
+    'Stage and Flow Hydrograph': 'Stage and Flow Hydrograph',
+    'Lateral Inflow Hydrograph': 'Lateral Inflow Hydrograph',
+    'Uniform Lateral Inflow Hydrograph': 'Uniform Lateral Inflow Hydrograph',
+    'Groundwater Interflow': 'Groundwater Interflow',
+    'Precipitation Hydrograph': 'Precipitation Hydrograph',
+    'Rating Curve': 'Rating Curve',
+    'Friction Slope': 'Normal Depth',
+    'Normal Depth': 'Normal Depth',
+    'Gate Name': 'Gate Openings',
+    'Elev Controlled Gate': 'Elevation Controlled Gates',
+    'Navigation Dam': 'Navigation Dams',
+    'IB Stage/Flow': 'IB Stage/Flow',
+    'Rule Operation': 'Rules',
+}
+
+
+def index_flow_file(flow_file):
+    # Index a .u## file in a single streaming pass.
+    # Returns the Flow Title and an ordered list of boundary condition records, one for each Boundary Location,
+    # with its location, boundary condition type, and DSS file and pathname.
+    # Each Met BC DSS file, and each DSS file that is not the first under a Boundary Location, gets its own record with dss_only True,
+    # which is not a boundary condition. Only Met BC records have a bc_type (the Met BC type, Ex: Precipitation).
+    # Hydrograph values are skipped, so memory does not grow with the size of the hydrographs.
+    flow_title = None
+    boundary_conditions = []
+    boundary_condition = None
+    dss_record = None
+    with open(flow_file, "r") as f:
+        for v in f:
+            v = v.strip('\n')
+
+            # The line in the u file with a dss pathname is always +1 lines from the line specifying the DSS File.
+            if dss_record is not None:
+                # The pathname is everything after the last '=', Met BC lines also include the Met BC type.
+                # (Ex: 'DSS Path=/A/B/FLOW//1HOUR/F/' or 'Met BC=Precipitation|Gridded DSS Pathname=/SHG/X/PRECIP///AORC/')
+                dss_record['dss_path'] = v.rsplit('=', 1)[-1]
+                dss_record = None
+                continue
+
+            if '=' not in v:
+                continue
+            key, value = v.split('=', 1)
+
+            if key == 'Flow Title' and flow_title is None:
+                flow_title = value
+
+            elif key == 'Boundary Location':
+                # Remove the blank fields from the comma separated River, Reach, RS, 2D Area, etc.
+                location = ', '.join([s.strip() for s in value.split(',') if s.strip() != ''])
+                boundary_condition = {
+                    'location': location,
+                    'bc_type': None,
+                    'dss_only': False,
+                    'dss_key': None,
+                    'dss_file': None,
+                    'dss_path': None,
+                }
+                boundary_conditions.append(boundary_condition)
+
+            elif key in BC_TYPES and boundary_condition is not None and boundary_condition['bc_type'] is None:
+                boundary_condition['bc_type'] = BC_TYPES[key]
+
+            elif "DSS File" in v:
+                # The DSS File key is everything before the last '=', Met BC lines also include the Met BC type. 
+                # (Ex: 'DSS File=.\BC\flow.dss' or 'Met BC=Precipitation|Gridded DSS Filename=.\BC\precip.dss')
+                dss_key, dss_file = v.rsplit('=', 1)
+                if key == 'DSS File' and boundary_condition is not None and boundary_condition['dss_key'] is None:
+                    dss_record = boundary_condition
+                else:
+                    # A DSS File line before the first Boundary Location, or a second one under a Boundary Location, is kept for its DSS file only.
+                    met_bc = key == 'Met BC'
+                    dss_record = {
+                        'location': boundary_condition['location'] if not met_bc and boundary_condition is not None else key,
+                        'bc_type': value.split('|')[0] if met_bc else None,
+                        'dss_only': True,
+                        'dss_key': None,
+                        'dss_file': None,
+                        'dss_path': None,
+                    }
+                    boundary_conditions.append(dss_record)
+                dss_record['dss_key'] = dss_key
+                dss_record['dss_file'] = dss_file
+
+    return {'Flow Title': flow_title, 'Boundary Conditions': boundary_conditions}
+
+
+def find_b_file_dss(b_file):
+    # Get the output dss filename from the b file. It will be the first line that ends with '.dss'
+    # The b file can be very large, so it is memory-mapped and searched forward with find, without reading it in to memory.
+    # Every line ending in '.dss' is collected, and if there are multiple dss files, the first is used and all of them are reported.
+    # Returns None if no dss filename is found.
+    with open(b_file, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        dss_lines = []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as b_map:
+            i = b_map.find(b'.dss')
+            while i != -1:
+                line_end = i + len(b'.dss')
+                # Only keep matches at the end of a line.
+                if b_map[line_end:line_end+1] in (b'', b'\n', b'\r'):
+                    line_start = max(b_map.rfind(b'\n', 0, i), b_map.rfind(b'\r', 0, i)) + 1
+                    dss_lines.append(b_map[line_start:line_end].decode('latin-1'))
+                i = b_map.find(b'.dss', line_end)
+
+    if len(dss_lines) == 0:
+        return None
+    # Keep the unique dss files in the order they are found.
+    dss_lines = list(dict.fromkeys(dss_lines))
+    if len(dss_lines) > 1:
+        print(f'Multiple DSS files found in {b_file}: {", ".join(dss_lines)}.\nUsing: {dss_lines[0]}')
+    return dss_lines[0]
 
 
 def dict_to_model_app_json(keyValues_dict, output_prj_json, args, model_application_key_order):
@@ -113,6 +218,26 @@ def dict_to_model_app_json(keyValues_dict, output_prj_json, args, model_applicat
         json.dump(ras_model_template_json, outfile, indent=4)
 
 
+def count_boundary_conditions(boundary_conditions):
+    # Count the boundary conditions by type as simulation parameters, in the order the types are found in the flow file.
+    # Records kept only for their DSS file, such as Met BCs, are not boundary locations, and are skipped.
+    bc_counts = {}
+    for bc in boundary_conditions:
+        if bc['dss_only']:
+            continue
+        bc_type = bc['bc_type'] if bc['bc_type'] is not None else 'Unknown'
+        bc_counts[bc_type] = bc_counts.get(bc_type, 0) + 1
+    parameters = []
+    for bc_type, count in bc_counts.items():
+        parameters.append(
+            {
+                "parameter": f"{bc_type} Boundary Conditions",
+                "value": count,
+            }
+        )
+    return parameters
+
+
 def dict_to_sim_json(keyValues_dict, prj_name, p_file, output_p_json, simulation_key_order, layers_wanted):
     # Open RAS Simulation Json Template
     cwd = os.getcwd()
@@ -120,7 +245,7 @@ def dict_to_sim_json(keyValues_dict, prj_name, p_file, output_p_json, simulation
         ras_sim_template_json = json.load(f)
 
     # keys to drop
-    drop_keys = ['_id', 'model_software', 'model_application', 'parameters',
+    drop_keys = ['_id', 'model_software', 'model_application',
                  'linked_resources', 'type', 'output_files']
     for key in drop_keys:
         del ras_sim_template_json[key]
@@ -138,32 +263,36 @@ def dict_to_sim_json(keyValues_dict, prj_name, p_file, output_p_json, simulation
     g_num = keyValues_dict['Geom File'][1:]
     u_num = keyValues_dict['Flow File'][1:]
 
-    # Get Unique input DSS files
-    dss_input_file_list = [el[0] for el in keyValues_dict['DSS Input Files']]
-    list_unique = list(set(dss_input_file_list))
+    # Get Unique input DSS files and the pathnames used from each, in the order they are found in the flow file.
+    # Boundary conditions without a DSS file are skipped.
+    dss_input_files = {}
+    for bc in keyValues_dict['Boundary Conditions']:
+        if bc['dss_file']:
+            dss_paths = dss_input_files.setdefault((bc['dss_key'], bc['dss_file']), [])
+            if bc['dss_path'] and bc['dss_path'] not in dss_paths:
+                dss_paths.append(bc['dss_path'])
 
-    # Parsing out variations of DSS Filenames and Titles
+    # Parsing out variations of DSS Filenames and Titles. (Ex: 'DSS File' or 'Met BC=Precipitation|Gridded DSS Filename')
     input_files = []
-    for i in list_unique:
-        j = i.split("=")
-        if len(j) == 3:
-            input_files.append(
-                {
-                    "title": j[0]+" "+j[1],
-                    "source_dataset": None,
-                    "description": j[0]+" "+j[1],
-                    "location": j[-1],
-                }
-            )
-        else:
-            input_files.append(
-                {
-                    "title": j[0],
-                    "source_dataset": None,
-                    "description": j[0],
-                    "location": j[-1],
-                }
-            )
+    for (dss_key, dss_file), dss_paths in dss_input_files.items():
+        title = dss_key.replace("=", " ")
+        description = title
+        if len(dss_paths) > 0:
+            description += f". DSS Pathnames: {', '.join(dss_paths)}"
+        # Add the DSS file's catalog summary to the description if the file could be read.
+        dss_description = keyValues_dict['DSS Descriptions'].get(dss_file)
+        if dss_description is not None:
+            description += f". {dss_description}"
+        input_files.append(
+            {
+                "title": title,
+                "source_dataset": None,
+                "description": description,
+                "location": dss_file,
+            }
+        )
+
+    parameters = count_boundary_conditions(keyValues_dict['Boundary Conditions'])
 
     # Add additional input files for layers_wanted found in plan hdf
     for layer in layers_wanted:
@@ -266,6 +395,10 @@ def dict_to_sim_json(keyValues_dict, prj_name, p_file, output_p_json, simulation
         )
 
     ras_sim_template_json['input_files'] = input_files
+    ras_sim_template_json['parameters'] = parameters
+    # Add the summary of the plan hdf results if available.
+    if keyValues_dict['Results Summary'] is not None:
+        ras_sim_template_json['parameters'].extend(keyValues_dict['Results Summary'])
 
     # use key order to sort output json
     ras_sim_template_json = {k: ras_sim_template_json[k] for k in simulation_key_order if k in ras_sim_template_json.keys()}
@@ -356,148 +489,392 @@ def get_p_files(prj_dir, prj_name):
         if p_file_prj_name == prj_name:
             pList.append(pFile)
 
-    return pList
+    # Sort so plans are always parsed and listed in the same order.
+    return sorted(pList)
 
 
-def parse_p(p_file_list, prj_name, wkt, crs, output_dir, args, simulation_key_order):
+def read_plan_file(p):
+    # Read a .p## file in to a dictionary of its key=value pairs and description.
+    with open(p, "r") as f:
+        # print(f.readlines())
+        lines = f.readlines()
 
-    plan_titles = {}
-    plan_titles['Plan Title'] = []
-    plan_titles['Plan Title w P File'] = []
-    plan_titles['P File'] = []
-    for p in p_file_list:
-        # print (p)
-        prj_dir, p_file_tail = os.path.split(p)
-        print(p_file_tail)
-        with open(p, "r") as f:
-            # print(f.readlines())
-            lines = f.readlines()
+    lines = [s.strip('\n') for s in lines]
+
+    # Create Dictionary
+    keyValues_dict, popList = trimmer.trim(lines)
+
+    # Add specific popList lines from prj file to keyValue_dict
+    beginDescriptionIndex = None
+    endDescriptionIndex = None
+    for v in popList:
+        if "BEGIN DESCRIPTION:" in lines[v]:
+            beginDescriptionIndex = v+1
+        if "END DESCRIPTION:" in lines[v]:
+            endDescriptionIndex = v
 
-        lines = [s.strip('\n') for s in lines]
 
-        # Create Dictionary
-        keyValues_dict, popList = trimmer.trim(lines)
+    if beginDescriptionIndex and endDescriptionIndex is not None:
+        description = ' '.join(
+            lines[beginDescriptionIndex:endDescriptionIndex])
+    else:
+        description = None
 
-        # Add specific popList lines from prj file to keyValue_dict
-        beginDescriptionIndex = None
-        endDescriptionIndex = None
-        for v in popList:
-            if "BEGIN DESCRIPTION:" in lines[v]:
-                beginDescriptionIndex = v+1
-            if "END DESCRIPTION:" in lines[v]:
-                endDescriptionIndex = v
+    keyValues_dict['Description'] = description
 
+    return keyValues_dict
 
-        if beginDescriptionIndex and endDescriptionIndex is not None:
-            description = ' '.join(
-                lines[beginDescriptionIndex:endDescriptionIndex])
-        else:
-            description = None
 
-        keyValues_dict['Description'] = description
+def read_geom_file(geom_file, header_bytes=65536):
+    # Read the wanted fields from a .g## file. Many plans share the same geometry file, so this is called once per file through parse_shared_files.
+    # The wanted fields are at the top of the file, so only the header is read, up to header_bytes, unless a field is missing.
+    geom_keyValues_dict = trimmer.trim_header(geom_file, ['Geom Title'], max_bytes=header_bytes)
+
+    return {'Geom Title': geom_keyValues_dict['Geom Title']}
 
-        # Add spatial_extent and coordinate_system from wkt and crs
-        keyValues_dict["spatial_extent"] = wkt
-        keyValues_dict["coordinate_system"] = crs
 
-        # Get associated geometry file
-        geom_file_extension = keyValues_dict['Geom File']
-        geom_file = os.path.join(prj_dir, prj_name + "." + geom_file_extension)
-        with open(geom_file, "r") as f:
-            geom_lines = f.readlines()
-        geom_lines = [s.strip('\n') for s in geom_lines]
+# The version of the simulation json output recorded in the manifest. Change it when the parser's output changes,
+# so plans extracted by an earlier version are re-extracted even if their files are unchanged.
+MANIFEST_VERSION = 4
 
-        # Create geometry Dictionary
-        geom_keyValues_dict, geom_popList = trimmer.trim(geom_lines)
 
-        # Add Specified key value pairs from geom file to p file.
-        keyValues_dict['Geom Title'] = geom_keyValues_dict['Geom Title']
+def get_dss_input_files(p, flow_data):
+    # Get the input DSS files of a plan's boundary conditions, as {location in the flow file: path}.
+    # DSS file locations in the flow file are relative to the project directory.
+    prj_dir = os.path.dirname(p)
+    dss_input_files = {}
+    for bc in flow_data['Boundary Conditions']:
+        if bc['dss_file'] and bc['dss_file'] not in dss_input_files:
+            dss_input_files[bc['dss_file']] = os.path.join(prj_dir, bc['dss_file'].replace('\\', '/'))
+    return dss_input_files
 
-        # Get associated u flow file
-        flow_file_extension = keyValues_dict['Flow File']
-        flow_file = os.path.join(prj_dir, prj_name + "." + flow_file_extension)
-        with open(flow_file, "r") as f:
-            flow_lines = f.readlines()
-        flow_lines = [s.strip('\n') for s in flow_lines]
 
-        # Create flow file Dictionary
-        flow_keyValues_dict, flow_popList = trimmer.trim(flow_lines)
+def get_plan_dependencies(p, keyValues_dict, prj_name, shp, dss_files=()):
+    # Get the [size, modified time] of every file a plan's simulation json is created from, including its input dss_files.
+    # Files that do not exist are set to None. The template and schema paths are built with os.path.join so they are found on any OS.
+    prj_dir, p_file_tail = os.path.split(p)
+    dependency_files = [
+        p,
+        os.path.join(prj_dir, prj_name + "." + keyValues_dict['Geom File']),
+        os.path.join(prj_dir, prj_name + "." + keyValues_dict['Flow File']),
+        os.path.join(prj_dir, prj_name + ".b" + p_file_tail.split(".")[-1][1:]),
+        f'{p}.hdf',
+        shp,
+        os.path.join("example", "input", "json", "ras_simulation.json"),
+        os.path.join("example", "input", "json", "simulation_schema.json"),
+    ] + list(dss_files)
 
-        # Get associated plan hdf file
+    dependencies = {}
+    for dependency_file in dependency_files:
         try:
-            with h5py.File(rf"{p}.hdf", "r") as f:
-                # get the terrain, inifiltration, land cover, and percent impervious filenames if available.
-                layers_wanted = ['Terrain Filename', 'Infiltration Filename', 'Land Cover Filename', 'Percent Impervious Filename']
-                for layer in layers_wanted:
-                    try:
-                        layer_filename = f['Geometry'].attrs[layer].decode('UTF-8')
-                        layer = layer.replace(' Filename', '')
-                        layer = layer.lower()
-                        keyValues_dict[layer] = layer_filename
-                    except:
-                        print(
-                            f'Unable to extract {layer} file from HDF: {p}.hdf.\nSetting {layer} to None.')
-                        layer = layer.replace(' Filename', '')
-                        layer = layer.lower()
-                        keyValues_dict[layer] = None
+            dependencies[dependency_file] = file_cache.fingerprint(dependency_file)[1:]
+        except OSError:
+            dependencies[dependency_file] = None
+
+    return dependencies
+
+
+def load_manifest(manifest_file):
+    # Open the manifest of plans extracted by a previous run. Returns the manifest's plans.
+    # Returns no plans if there is no manifest, or if it was written by a different MANIFEST_VERSION.
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, 'r') as f:
+            manifest = json.load(f)
+    except ValueError:
+        print(f'Unable to read manifest file: {manifest_file}. Re-extracting all plans.')
+        return {}
+    if manifest.get('version') != MANIFEST_VERSION:
+        print(f'Manifest file is from a different parser version: {manifest_file}. Re-extracting all plans.')
+        return {}
+    return manifest['plans']
+
+
+def try_parse_file(file, parse_func):
+    # Wrapper around a file parser that returns the error instead of raising it, so a bad geometry or flow file only fails the plans that use it.
+    # Returns a tuple of (parsed data, error).
+    try:
+        return parse_func(file), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+def parse_shared_files(files, parse_func, executor=None):
+    # Parse each distinct file once, in the process pool if an executor is given, otherwise serially.
+    # Most plans share the same geometry and flow files, so they are parsed before the plans and handed to every plan that references them.
+    # Returns {file: (parsed data, error)}.
+    if executor is None:
+        return {file: try_parse_file(file, parse_func) for file in files}
+    futures = {file: executor.submit(try_parse_file, file, parse_func) for file in files}
+    return {file: future.result() for file, future in futures.items()}
+
+
+def get_shared_file_stats(name, plan_files):
+    # Report how many plans reused a parsed file, in the same format as the file caches.
+    # plan_files is the file referenced by each plan.
+    misses = len(set(plan_files))
+    return f'{name} cache: {len(plan_files) - misses} hits, {misses} misses'
+
+
+def read_plan(p, flow_data, hdf_cache, dss_cache=None):
+    # Get a .p## file's cached plan hdf metadata, and the catalogs of its input DSS files.
+    # Only the hdf_cache is checked here. On a cache miss, hdf_meta is None and the plan hdf file is opened by parse_plan in the worker.
+    # The DSS catalog summaries are read through dss_cache, so unchanged files are not read again.
+    # dss_cache is None unless DSS catalogs are turned on, and then no DSS files are read.
+    # Get associated plan hdf file metadata, if it is cached.
+    hdf_meta = hdf_cache.lookup(f'{p}.hdf')
+
+    # Describe each input DSS file from its catalog.
+    dss_descriptions = {}
+    if dss_cache is None:
+        return hdf_meta, dss_descriptions
+    for dss_file, dss_path in get_dss_input_files(p, flow_data).items():
+        dss_descriptions[dss_file] = dss_catalog.describe_dss_file(dss_path, dss_cache)
+
+    return hdf_meta, dss_descriptions
+
+
+def parse_plan(p, keyValues_dict, geom_data, flow_data, hdf_meta, dss_descriptions, results_summary, summarize_results,
+               prj_name, wkt, crs, output_dir, prj, shp, simulation_key_order):
+    # Parse a single .p## file, include data from its geometry, flow, hdf, and b files, and write its simulation json.
+    # If summarize_results is True, the plan hdf results are summarized as parameters, unless a cached results_summary is given.
+    # If hdf_meta is None, the plan hdf metadata was not cached, and it is read from the plan hdf file.
+    # Returns the plan title entries for the model application json, the results summary, and the plan hdf metadata.
+    prj_dir, p_file_tail = os.path.split(p)
+    print(p_file_tail)
+
+    # Get associated plan hdf file metadata
+    if hdf_meta is None:
+        try:
+            hdf_meta = ras_hdf.read_plan_hdf_meta(f'{p}.hdf')
         except:
             print(
                 f'Unable to open HDF File: {p}.hdf.\nSetting Terrain, Infiltration, Land Cover, and Percent Impervious to None.')
-            keyValues_dict['terrain'] = None
-            keyValues_dict['infiltration'] = None
-            keyValues_dict['land cover'] = None
-            keyValues_dict['percent impervious'] = None
-
-         # Get Input DSS files and paths from flow file to p file.
-        dss_file_and_paths = getDSSPaths(flow_lines)
-        keyValues_dict['DSS Input Files'] = dss_file_and_paths
-
-        # Add Specified key value pairs from flow file to p file.
-        keyValues_dict['Flow Title'] = flow_keyValues_dict['Flow Title']
-
-        # Append plan title list
-        keyValues_dict['Plan Title'] = f"{keyValues_dict['Plan Title']}"
-        keyValues_dict['Plan Title w P File'] = f"Simulation: {keyValues_dict['Plan Title']}, File: {p_file_tail}"
-        plan_titles['Plan Title'].append(keyValues_dict['Plan Title'])
-        plan_titles['Plan Title w P File'].append(
-            keyValues_dict['Plan Title w P File'])
-        plan_titles['P File'].append(p_file_tail)
-
-        # Set dss output file if not already set in the p file other than as 'dss' or '' which RAS defaults to.
-        if ('DSS Output File' not in keyValues_dict.keys()
-        or keyValues_dict['DSS Output File'] == 'dss' 
-        or keyValues_dict['DSS Output File'] == ''):          
-            # Open the b file to get the output dss filename
-            b_file = os.path.join(prj_dir, prj_name + ".b" + p_file_tail.split(".")[-1][1:])
+
+    # Summarize the plan hdf results datasets.
+    if summarize_results and results_summary is None:
+        try:
+            results_summary = ras_hdf.summarize_plan_results(f'{p}.hdf')
+        except:
+            print(f'Unable to summarize results from HDF: {p}.hdf.\n{traceback.format_exc()}')
+    keyValues_dict['Results Summary'] = results_summary if summarize_results else None
+
+    # Add spatial_extent and coordinate_system from wkt and crs
+    keyValues_dict["spatial_extent"] = wkt
+    keyValues_dict["coordinate_system"] = crs
+
+    # Add Specified key value pairs from geom file to p file.
+    keyValues_dict['Geom Title'] = geom_data['Geom Title']
+
+    # get the terrain, inifiltration, land cover, and percent impervious filenames if available.
+    layers_wanted = ras_hdf.GEOMETRY_ATTRS
+    for layer in layers_wanted:
+        layer_key = layer.replace(' Filename', '').lower()
+        if hdf_meta is None:
+            keyValues_dict[layer_key] = None
+        else:
+            keyValues_dict[layer_key] = hdf_meta[layer]
+            if hdf_meta[layer] is None:
+                print(
+                    f'Unable to extract {layer} file from HDF: {p}.hdf.\nSetting {layer} to None.')
+
+    # Add boundary conditions with their input DSS files and paths, and specified key value pairs from flow file to p file.
+    keyValues_dict['Boundary Conditions'] = flow_data['Boundary Conditions']
+    keyValues_dict['Flow Title'] = flow_data['Flow Title']
+    keyValues_dict['DSS Descriptions'] = dss_descriptions
+
+    # Plan title entries for the model application json.
+    keyValues_dict['Plan Title'] = f"{keyValues_dict['Plan Title']}"
+    keyValues_dict['Plan Title w P File'] = f"Simulation: {keyValues_dict['Plan Title']}, File: {p_file_tail}"
+    plan_title = {
+        'Plan Title': keyValues_dict['Plan Title'],
+        'Plan Title w P File': keyValues_dict['Plan Title w P File'],
+        'P File': p_file_tail,
+    }
+
+    # Set dss output file if not already set in the p file other than as 'dss' or '' which RAS defaults to.
+    if ('DSS Output File' not in keyValues_dict.keys()
+    or keyValues_dict['DSS Output File'] == 'dss' 
+    or keyValues_dict['DSS Output File'] == ''):          
+        # Open the b file to get the output dss filename
+        b_file = os.path.join(prj_dir, prj_name + ".b" + p_file_tail.split(".")[-1][1:])
+        try:
+            keyValues_dict['DSS Output File'] = find_b_file_dss(b_file)
+        except:
+            keyValues_dict['DSS Output File'] = None
+        if keyValues_dict['DSS Output File'] is None:
+            print(f'Unable to parse Out DSS File from: {b_file}.\nSetting DSS Output File to None.')
+
+    # Get root project directory from prj
+    prj_dir = os.path.dirname(prj)
+    # Get parent directory of prj_dir
+    prj_parent_dir = os.path.dirname(prj_dir)
+    # If the shp file is in the project directory or subdirectory, then use the relative path by removing the parent directory.
+    shp_file = shp.replace(prj_parent_dir, '').replace('\\', '/')
+    # Add shp file location
+    keyValues_dict['shp'] = shp_file
+
+    # Write the output yaml for each .p## file.
+    # with open(os.path.join(output_dir,f'{p_file_tail}.yml'), 'w+') as f:
+    #     yaml.dump(keyValues_dict, f)
+
+    # Write output Json for each .p## file.
+    output_p_json = os.path.join(
+        output_dir, f'{p_file_tail}_Simulation.json')
+    dict_to_sim_json(keyValues_dict, prj_name, p, output_p_json, simulation_key_order, layers_wanted)
+
+    return plan_title, keyValues_dict['Results Summary'], hdf_meta
+
+
+def try_parse_plan(p, *plan_args):
+    # Wrapper around parse_plan that returns the error instead of raising it, so one bad plan does not abort the run.
+    # Returns a tuple of (p, plan_title, results_summary, hdf_meta, error).
+    try:
+        return p, *parse_plan(p, *plan_args), None
+    except Exception:
+        return p, None, None, None, traceback.format_exc()
+
+
+def parse_p(p_file_list, prj_name, wkt, crs, output_dir, args, simulation_key_order, hdf_cache, workers=None, force=False, results=False, dss_cache=None):
+    # Parse each .p## file as a simulation. 
+    # If workers is greater than 1, the distinct geometry and flow files, and then the plans, are parsed in a process pool, otherwise serially.
+    # If results is True, each plan's hdf results are summarized as parameters, and the summaries are cached in the output directory.
+    # If dss_cache is given, each plan's input DSS files are described from their catalogs.
+    # Plans whose dependency files are unchanged since the last run (as recorded in the manifest) are skipped unless force is True.
+    # Returns the plan titles in the same order as p_file_list, and a list of [p file, error] for each plan that failed.
+    plan_args = (prj_name, wkt, crs, output_dir, args.prj, args.shp, simulation_key_order)
+
+    manifest_file = os.path.join(output_dir, f'{prj_name}_manifest.json')
+    manifest = load_manifest(manifest_file)
+    new_manifest = {}
+    plan_dependencies = {}
+    skipped_plans = []
+    if results:
+        results_cache = file_cache.DiskCache('Plan HDF results summary', os.path.join(output_dir, f'{prj_name}_results_cache.json'))
+
+    # The process pool is used both to parse the shared geometry and flow files, and then to parse the plans.
+    executor = ProcessPoolExecutor(max_workers=workers) if workers is not None and workers > 1 else None
+    try:
+        # Read the plan files, and skip the plans that are unchanged since the last run.
+        plan_results = {}
+        plan_reads = []
+        for p in p_file_list:
+            p_file_tail = os.path.split(p)[1]
             try:
-                with open(b_file, "r") as f:
-                    b_lines = f.readlines()
-                b_lines = [s.strip('\n') for s in b_lines]
-                # Get the output dss filename from the b file. It will be a line that ends with '.dss'
-                keyValues_dict['DSS Output File'] = [line for line in b_lines if line.endswith('.dss')][0]
-            except:
-                print(f'Unable to parse Out DSS File from: {b_file}.\nSetting DSS Output File to None.')
-                keyValues_dict['DSS Output File'] = None
-
-        # Get root project directory from args.prj
-        prj_dir = os.path.dirname(args.prj)
-        # Get parent directory of prj_dir
-        prj_parent_dir = os.path.dirname(prj_dir)
-        # If the shp file is in the project directory or subdirectory, then use the relative path by removing the parent directory.
-        shp_file = args.shp.replace(prj_parent_dir, '').replace('\\', '/')
-        # Add shp file location
-        keyValues_dict['shp'] = shp_file
-
-        # Write the output yaml for each .p## file.
-        # with open(os.path.join(output_dir,f'{p_file_tail}.yml'), 'w+') as f:
-        #     yaml.dump(keyValues_dict, f)
-
-        # Write output Json for each .p## file.
-        output_p_json = os.path.join(
-            output_dir, f'{p_file_tail}_Simulation.json')
-        dict_to_sim_json(keyValues_dict, prj_name, p, output_p_json, simulation_key_order, layers_wanted)
-
-    return plan_titles
+                keyValues_dict = read_plan_file(p)
+                # The input DSS files are only known from the flow file. If the flow file is unchanged, they are the DSS files in the manifest.
+                manifest_entry = manifest.get(p_file_tail)
+                dss_files = manifest_entry.get('dss_files', []) if manifest_entry is not None else []
+                dependencies = get_plan_dependencies(p, keyValues_dict, prj_name, args.shp, dss_files)
+
+                # Skip plans that are unchanged since the last run, and use the plan title from the manifest.
+                output_p_json = os.path.join(output_dir, f'{p_file_tail}_Simulation.json')
+                if (not force
+                and manifest_entry is not None
+                and manifest_entry['dependencies'] == dependencies
+                and manifest_entry.get('results', False) == results
+                and manifest_entry.get('dss_catalog', False) == (dss_cache is not None)
+                and os.path.exists(output_p_json)):
+                    plan_results[p] = (p, manifest_entry['plan_title'], None, None, None)
+                    new_manifest[p_file_tail] = manifest_entry
+                    skipped_plans.append(p_file_tail)
+                    continue
+
+                prj_dir = os.path.split(p)[0]
+                geom_file = os.path.join(prj_dir, prj_name + "." + keyValues_dict['Geom File'])
+                flow_file = os.path.join(prj_dir, prj_name + "." + keyValues_dict['Flow File'])
+                plan_reads.append([p, keyValues_dict, geom_file, flow_file])
+            except Exception:
+                plan_results[p] = (p, None, None, None, traceback.format_exc())
+        if len(skipped_plans) > 0:
+            print(f'Skipped {len(skipped_plans)} unchanged plan files: {", ".join(skipped_plans)}')
+
+        # Parse each geometry and flow file once no matter how many plans reference it.
+        geom_files = [geom_file for p, keyValues_dict, geom_file, flow_file in plan_reads]
+        flow_files = [flow_file for p, keyValues_dict, geom_file, flow_file in plan_reads]
+        geom_results = parse_shared_files(list(dict.fromkeys(geom_files)), read_geom_file, executor)
+        flow_results = parse_shared_files(list(dict.fromkeys(flow_files)), index_flow_file, executor)
+        print(get_shared_file_stats('Geometry file', geom_files))
+        print(get_shared_file_stats('Flow file', flow_files))
+
+        plan_jobs = []
+        hdf_misses = []
+        plan_dss_files = {}
+        for p, keyValues_dict, geom_file, flow_file in plan_reads:
+            geom_data, geom_error = geom_results[geom_file]
+            flow_data, flow_error = flow_results[flow_file]
+            if geom_error is not None or flow_error is not None:
+                plan_results[p] = (p, None, None, None, geom_error if geom_error is not None else flow_error)
+                continue
+            try:
+                # Record the plan's dependencies, including the input DSS files from its flow file.
+                plan_dss_files[p] = list(get_dss_input_files(p, flow_data).values())
+                plan_dependencies[p] = get_plan_dependencies(p, keyValues_dict, prj_name, args.shp, plan_dss_files[p])
+                results_summary = results_cache.lookup(f'{p}.hdf') if results else None
+                hdf_meta, dss_descriptions = read_plan(p, flow_data, hdf_cache, dss_cache)
+                if hdf_meta is None:
+                    hdf_misses.append(p)
+                plan_jobs.append([p, keyValues_dict, geom_data, flow_data, hdf_meta, dss_descriptions, results_summary, results])
+            except Exception:
+                plan_results[p] = (p, None, None, None, traceback.format_exc())
+        print(hdf_cache.stats())
+        if dss_cache is not None:
+            print(dss_cache.stats())
+
+        if executor is None:
+            for job in plan_jobs:
+                plan_results[job[0]] = try_parse_plan(*job, *plan_args)
+        else:
+            print(f'Parsing {len(plan_jobs)} plan files using {workers} workers.')
+            futures = [executor.submit(try_parse_plan, *job, *plan_args) for job in plan_jobs]
+            for future in futures:
+                plan_result = future.result()
+                plan_results[plan_result[0]] = plan_result
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    plan_titles = {}
+    plan_titles['Plan Title'] = []
+    plan_titles['Plan Title w P File'] = []
+    plan_titles['P File'] = []
+    failed_plans = []
+    # Collect results in the order of p_file_list so the output is deterministic.
+    for p, plan_title, results_summary, hdf_meta, error in [plan_results[p] for p in p_file_list]:
+        if error is not None:
+            failed_plans.append([p, error])
+            continue
+        for key in plan_titles.keys():
+            plan_titles[key].append(plan_title[key])
+
+    # Report failed plans.
+    for p, error in failed_plans:
+        print(f'\nError: Unable to parse plan file: {p}\n{error}')
+
+    # Cache the plan hdf metadata read by the workers, so the plan hdf files are not opened again while they are unchanged.
+    for p in hdf_misses:
+        hdf_meta = plan_results[p][3]
+        if hdf_meta is not None:
+            hdf_cache.put(f'{p}.hdf', hdf_meta)
+
+    # Record the dependencies of each re-extracted plan in the manifest. Failed plans are left out so they are retried next run.
+    for p, dependencies in plan_dependencies.items():
+        p, plan_title, results_summary, hdf_meta, error = plan_results[p]
+        if error is None:
+            new_manifest[os.path.split(p)[1]] = {'dependencies': dependencies, 'dss_files': plan_dss_files[p], 'plan_title': plan_title, 'results': results,
+                                               'dss_catalog': dss_cache is not None}
+            if results and results_summary is not None:
+                results_cache.put(f'{p}.hdf', results_summary)
+    if results:
+        print(results_cache.stats())
+        results_cache.save()
+    with open(manifest_file, 'w') as f:
+        json.dump({'version': MANIFEST_VERSION, 'plans': new_manifest}, f, indent=4)
+    re_extracted = len(p_file_list) - len(skipped_plans) - len(failed_plans)
+    print(f'Re-extracted {re_extracted} of {len(p_file_list)} plan files.' + (f' {len(failed_plans)} failed.' if len(failed_plans) > 0 else ''))
+
+    return plan_titles, failed_plans
 
 
 def parse(args):
@@ -508,9 +885,11 @@ def parse(args):
         # Get project name without extension, it is possible to have multiple periods in the project name.
         prj_name = '.'.join(prj_file_tail.split(".")[:-1])
 
-        # Set output directory
+        # Set output directory, unless it is set by the caller.
         cwd = os.getcwd()
-        output_dir = os.path.join(cwd, 'output', 'ras', prj_name)
+        output_dir = getattr(args, 'output_dir', None)
+        if output_dir is None:
+            output_dir = os.path.join(cwd, 'output', 'ras', prj_name)
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
@@ -529,8 +908,15 @@ def parse(args):
                 if not os.path.exists(f'{p}.hdf'):
                     p_file_list.remove(p)
                     print(f'\nWarning: {p}.hdf file not found. Removing {p} from list of plan files to parse as simulations.')
+            # Plan hdf metadata is cached in the output directory between runs, keyed by the hdf file path, size, and modified time.
+            hdf_cache = file_cache.DiskCache('Plan HDF metadata', os.path.join(output_dir, f'{prj_name}_hdf_cache.json'))
+            # If DSS catalogs are turned on, input DSS catalog summaries are cached the same way, keyed by the DSS file path, size, and modified time.
+            dss_cache = None
+            if getattr(args, 'dss_catalog', False):
+                dss_cache = file_cache.DiskCache('DSS catalog', os.path.join(output_dir, f'{prj_name}_dss_catalog_cache.json'))
+
             # Get RAS Project's Spatial Projection WKT
-            ras_prj_wkt = get_ras_prj_wkt(p_file_list[0])
+            ras_prj_wkt = get_ras_prj_wkt(p_file_list[0], hdf_cache)
 
             # Get WKT and CRS from shp
             wkt, crs = get_wkt_crs.parse_shp(
@@ -542,16 +928,27 @@ def parse(args):
 
             # Parse p files and include data from geometry, flow files. and add wkt.
             # Returns the plan titles of each p file as a list.
-            plan_titles = parse_p(p_file_list, prj_name,
-                                  wkt, crs, output_dir, args, simulation_key_order)
-            
+            plan_titles, failed_plans = parse_p(p_file_list, prj_name,
+                                  wkt, crs, output_dir, args, simulation_key_order, hdf_cache,
+                                  workers=getattr(args, 'workers', None), force=getattr(args, 'force', False),
+                                  results=getattr(args, 'results', False), dss_cache=dss_cache)
+            hdf_cache.save()
+            if dss_cache is not None:
+                dss_cache.save()
             
+            # Validate that at least one plan was parsed.
+            if len(plan_titles['P File']) == 0:
+                msg = f'\nError: Unable to parse any of the {len(p_file_list)} plan files in {prj_dir}.'
+                raise Exception(msg)
 
             # Parse prj, remove extra fields, add list of p file titles, and wkt.
             parse_prj(args, prj_name, wkt, crs, plan_titles, output_dir, model_application_key_order)
 
             #  Return Successful Output message.
             msg = f'RAS Parsing Complete. Output files located at: {output_dir}'
+            if len(failed_plans) > 0:
+                failed_p_files = ', '.join([os.path.split(p)[1] for p, error in failed_plans])
+                msg = f'{msg}\nWarning: {len(failed_plans)} of {len(p_file_list)} plan files failed to parse: {failed_p_files}'
             return msg
 
     except Exception:
@@ -590,6 +987,29 @@ if __name__ == '__main__':
         type=str
     )
 
+    p.add_argument(
+        "--workers", help="Optional. The number of worker processes used to parse plan files in parallel. \
+        Plans are parsed serially if not set or set to 1. (Ex: 4)",
+        required=False,
+        type=int
+    )
+
+    p.add_argument(
+        "--force", help="Optional. Re-extract every plan file, even if its files are unchanged since the last run.",
+        action="store_true"
+    )
+    p.add_argument(
+        "--results", help="Optional. Summarize each plan's results from its plan hdf file as simulation parameters, \
+        such as 2D flow area maximum water surface and depth, and reference line peak flows.",
+        action="store_true"
+    )
+
+    p.add_argument(
+        "--dss_catalog", help="Optional. Add a summary of each input DSS file's catalog, its record count, parameters, and date range, \
+        to the DSS file descriptions. Only the first 64 MB of each DSS file is searched for record pathnames.",
+        action="store_true"
+    )
+
     args = p.parse_args()
 
     # Split keywords argument into a list
@@ -0,0 +1,24 @@
+import os
+import sys
+import pytest
+
+# The parsers are run from the repository root, and import the utils directory from there.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def dss_bytes(pathnames, padding=0):
+    # Build the bytes of a synthetic DSS 7 file: the header, then each pathname in its own null separated field.
+    # padding null bytes are added before the pathnames, to place them past a scan limit.
+    data = b'ZDSS' + b'\x00' * 12 + b'7-IQ' + b'\x00' * 44 + b'\x00' * padding
+    for pathname in pathnames:
+        data += b'\x00\x00\x00\x00' + pathname.encode('ascii') + b'\x00\x00\x00\x00'
+    return data
+
+@pytest.fixture
+def make_dss_file(tmp_path):
+    # Write a synthetic DSS file with the given pathnames, and return its path.
+    def make(name, pathnames, padding=0):
+        dss_file = tmp_path / name
+        dss_file.parent.mkdir(parents=True, exist_ok=True)
+        dss_file.write_bytes(dss_bytes(pathnames, padding))
+        return str(dss_file)
+    return make
@@ -0,0 +1,43 @@
+import struct
+import numpy as np
+from utils import dbf_summary
+
+def write_dbf(dbf_file, columns, records):
+    # Write a .dbf file. columns is a list of (name, type, length, decimals), and records is a list of (deleted, [values as bytes]).
+    header_length = 32 + 32 * len(columns) + 1
+    record_length = 1 + sum(column[2] for column in columns)
+    with open(dbf_file, 'wb') as f:
+        f.write(struct.pack('<B3BIHH20x', 3, 124, 1, 1, len(records), header_length, record_length))
+        for name, column_type, length, decimals in columns:
+            f.write(struct.pack('<11sc4xBB14x', name.encode('ascii'), column_type.encode('ascii'), length, decimals))
+        f.write(b'\r')
+        for deleted, values in records:
+            f.write(b'*' if deleted else b' ')
+            for (name, column_type, length, decimals), value in zip(columns, values):
+                f.write(value.rjust(length))
+        f.write(b'\x1a')
+
+COLUMNS = [('LifeLoss', 'N', 8, 0), ('StructDam', 'N', 10, 2)]
+
+def test_to_numbers():
+    numbers = dbf_summary.to_numbers(np.array([b' 1.5', b'', b'*****', b'abc', b'2'], dtype='S5'))
+    assert np.array_equal(numbers, [1.5, np.nan, np.nan, np.nan, 2.0], equal_nan=True)
+
+def test_summarize_dbf(tmp_path):
+    dbf_file = str(tmp_path / 'results.dbf')
+    write_dbf(dbf_file, COLUMNS, [
+        (False, [b'1', b'10.25']),
+        (False, [b'2', b'']),
+        (True, [b'100', b'100.00']),
+    ])
+    assert dbf_summary.summarize_dbf(dbf_file) == {'record_count': 2, 'totals': {'LifeLoss': 3, 'StructDam': 10.25}}
+
+def test_summarize_dbf_text_in_numeric_column(tmp_path):
+    # Text that is not a number is skipped like a blank value, in every chunk it is in.
+    dbf_file = str(tmp_path / 'results.dbf')
+    write_dbf(dbf_file, COLUMNS, [
+        (False, [b'1', b'abc']),
+        (False, [b'abc', b'2.50']),
+        (False, [b'3', b'1.00']),
+    ])
+    assert dbf_summary.summarize_dbf(dbf_file, chunk_records=2) == {'record_count': 3, 'totals': {'LifeLoss': 4, 'StructDam': 3.5}}
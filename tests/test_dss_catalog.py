@@ -0,0 +1,51 @@
+from utils import dss_catalog
+
+PATHNAMES = [
+    '/A/B/FLOW/01JAN2020/1HOUR/F/',
+    '/A/C/STAGE/01FEB2020/1HOUR/F/',
+]
+
+def test_read_dss_catalog(make_dss_file):
+    catalog = dss_catalog.read_dss_catalog(make_dss_file('test.dss', PATHNAMES))
+    assert catalog['version'] == '7-IQ'
+    assert catalog['truncated'] is False
+    assert [pathname['pathname'] for pathname in catalog['pathnames']] == PATHNAMES
+    assert catalog['start'] == '2020-01-01'
+    assert catalog['end'] == '2020-02-29'
+
+def test_read_dss_catalog_skips_pathnames_in_text(make_dss_file):
+    # A pathname inside a run of other printable text is not a record pathname.
+    dss_file = make_dss_file('test.dss', PATHNAMES[:1] + ['note /X/Y/Z/01JAN1990/1DAY/Q/ text'])
+    catalog = dss_catalog.read_dss_catalog(dss_file)
+    assert [pathname['pathname'] for pathname in catalog['pathnames']] == PATHNAMES[:1]
+
+def test_read_dss_catalog_not_dss(tmp_path):
+    not_dss = tmp_path / 'test.dss'
+    not_dss.write_bytes(b'not a dss file')
+    assert dss_catalog.read_dss_catalog(str(not_dss)) is None
+
+def test_describe_dss_file(make_dss_file):
+    description = dss_catalog.describe_dss_file(make_dss_file('test.dss', PATHNAMES))
+    assert description == 'DSS 7 file with 2 records of FLOW, STAGE, from 2020-01-01 to 2020-02-29'
+
+def test_describe_dss_file_truncated(make_dss_file):
+    # Only the first pathname is within the scan limit. The record count is a lower bound and the date range is left out.
+    dss_file = make_dss_file('test.dss', PATHNAMES)
+    max_scan_bytes = 64 + 4 + len(PATHNAMES[0]) + 4
+
+    catalog = dss_catalog.read_dss_catalog(dss_file, max_scan_bytes)
+    assert catalog['truncated'] is True
+    assert [pathname['pathname'] for pathname in catalog['pathnames']] == PATHNAMES[:1]
+
+    summary = dss_catalog.summarize_dss_catalog(dss_file, max_scan_bytes)
+    assert summary['start'] is None and summary['end'] is None
+
+    description = dss_catalog.describe_dss_file(dss_file, max_scan_bytes=max_scan_bytes)
+    assert description == (f'DSS 7 file with at least 1 record of FLOW, read from the first {max_scan_bytes} bytes of the file only. '
+                           'Date range unknown')
+
+def test_describe_dss_file_truncated_past_padding(make_dss_file):
+    # Every pathname is past the scan limit.
+    dss_file = make_dss_file('test.dss', PATHNAMES, padding=1024 * 1024)
+    description = dss_catalog.describe_dss_file(dss_file, max_scan_bytes=1024 * 1024)
+    assert description == 'DSS 7 file with at least 0 records, read from the first 1 MB of the file only. Date range unknown'
@@ -0,0 +1,18 @@
+import os
+import hms_parser
+from utils import file_cache
+
+def test_extra_dss_files_relative_dss_dir(tmp_path, monkeypatch, make_dss_file):
+    # A relative --dss directory is resolved once, so the DSS files are found and described from their catalogs.
+    make_dss_file('input/dss/flow.dss', ['/A/B/FLOW/01JAN2020/1HOUR/F/'])
+    output_dir = tmp_path / 'output'
+    output_dir.mkdir()
+    monkeypatch.chdir(tmp_path)
+    dss_cache = file_cache.DiskCache('DSS catalog', str(output_dir / 'dss_catalog_cache.json'))
+
+    input_files = hms_parser.get_extra_dss_files(os.path.join('input', 'dss'), 'Test', str(tmp_path / 'models'), str(output_dir),
+                                                 dss_cache=dss_cache)
+
+    assert len(input_files) == 1
+    assert input_files[0]['description'] == ('User Added from Input DSS File Directory. '
+                                             'DSS 7 file with 1 record of FLOW, from 2020-01-01 to 2020-01-31')
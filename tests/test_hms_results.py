@@ -0,0 +1,44 @@
+from utils import hms_results
+
+def write_results(results_file, elements):
+    # Write an HMS results file. elements is a list of (name, drainage area, peak flow, volume, volume units).
+    lines = ['<RunResults>', '<BasinElements>']
+    for name, area, peak, volume, volume_units in elements:
+        lines.append(
+            f'<BasinElement name="{name}" type="Junction"><Drainage area="{area}" units="MI2"/><Statistics>'
+            f'<StatisticMeasure type="Outflow Maximum" value="{peak}" units="CFS"/>'
+            f'<StatisticMeasure type="Outflow Maximum Time" value="01Jan2020, 12:00"/>'
+            f'<StatisticMeasure type="Outflow Volume" value="{volume}" units="{volume_units}"/>'
+            f'</Statistics><TimeSeries><Value>1.0</Value></TimeSeries></BasinElement>'
+        )
+    lines.extend(['</BasinElements>', '</RunResults>'])
+    results_file.write_text('\n'.join(lines))
+    return str(results_file)
+
+def test_summarize_results_file(tmp_path):
+    results_file = write_results(tmp_path / 'RUN_Run_1.results', [
+        ['Sub1', 1.0, 10.0, 100.0, 'AC-FT'],
+        ['Out1', 1.0, 20.0, 150.5, 'AC-FT'],
+        ['Out2', 2.0, 30.0, 50.25, 'AC-FT'],
+    ])
+    parameters = {parameter['parameter']: parameter['value'] for parameter in hms_results.summarize_results_file(results_file, ['Out1', 'Out2'])}
+    assert parameters['Result Elements'] == 3
+    assert parameters['Out1 Peak Flow (CFS)'] == 20.0
+    assert parameters['Out2 Volume (AC-FT)'] == 50.25
+    assert parameters['Out1 Time of Peak'] == '01Jan2020, 12:00'
+    assert parameters['Total Volume (AC-FT)'] == 200.75
+    assert 'Sub1 Peak Flow (CFS)' not in parameters
+
+def test_summarize_results_file_depth_volume(tmp_path):
+    # A total volume reported as a depth is averaged over the outlets' drainage areas.
+    results_file = write_results(tmp_path / 'RUN_Run_1.results', [
+        ['Out1', 1.0, 20.0, 3.0, 'IN'],
+        ['Out2', 3.0, 30.0, 1.0, 'IN'],
+    ])
+    parameters = {parameter['parameter']: parameter['value'] for parameter in hms_results.summarize_results_file(results_file, ['Out1', 'Out2'])}
+    assert parameters['Total Volume (IN)'] == 1.5
+
+def test_summarize_results_file_unreadable(tmp_path):
+    results_file = tmp_path / 'RUN_Run_1.results'
+    results_file.write_text('<RunResults><BasinElements>')
+    assert hms_results.summarize_results_file(str(results_file), ['Out']) == []
@@ -0,0 +1,32 @@
+import h5py
+import numpy as np
+from utils import ras_hdf
+
+def write_reference_lines(p_hdf, flow):
+    with h5py.File(p_hdf, 'w') as f:
+        group = f.create_group(f'{ras_hdf.TIME_SERIES}/Reference Lines')
+        group.create_dataset('Flow', data=flow, maxshape=(None, flow.shape[1]), chunks=(1, flow.shape[1]))
+        group.create_dataset('Name', data=[b'Line A', b'Line B'])
+
+def test_max_over_time(tmp_path):
+    p_hdf = str(tmp_path / 'Test.p01.hdf')
+    write_reference_lines(p_hdf, np.array([[1.0, np.nan], [3.0, 2.0], [2.0, np.nan]]))
+    with h5py.File(p_hdf, 'r') as f:
+        flow = f[f'{ras_hdf.TIME_SERIES}/Reference Lines/Flow']
+        assert np.array_equal(ras_hdf.max_over_time(flow, slice(0, 2), 8), [3.0, 2.0])
+
+def test_max_over_time_no_time_steps(tmp_path):
+    p_hdf = str(tmp_path / 'Test.p01.hdf')
+    write_reference_lines(p_hdf, np.zeros((0, 2)))
+    with h5py.File(p_hdf, 'r') as f:
+        flow = f[f'{ras_hdf.TIME_SERIES}/Reference Lines/Flow']
+        assert np.isnan(ras_hdf.max_over_time(flow, slice(0, 2), 64)).all()
+        assert ras_hdf.summarize_peak_flows(f, 'Reference Lines', 64) == {}
+
+def test_summarize_plan_results_peak_flows(tmp_path):
+    p_hdf = str(tmp_path / 'Test.p01.hdf')
+    write_reference_lines(p_hdf, np.array([[1.0, 5.0], [3.0, 2.0]]))
+    assert ras_hdf.summarize_plan_results(p_hdf) == [
+        {'parameter': 'Reference Line Line A Peak Flow', 'value': 3.0},
+        {'parameter': 'Reference Line Line B Peak Flow', 'value': 5.0},
+    ]
@@ -0,0 +1,62 @@
+import os
+import ras_parser
+
+def test_find_b_file_dss_multiple(tmp_path, capsys):
+    # The first dss file in the b file is used, and every dss file found is reported.
+    b_file = tmp_path / 'Test.b01'
+    b_file.write_bytes(b'Plan Title=Test\r\nbackup.dss.bak\r\nC:\\Models\\Test.dss\r\n' + b'x' * 100000 + b'\r\nOther.dss\r\n')
+    assert ras_parser.find_b_file_dss(str(b_file)) == 'C:\\Models\\Test.dss'
+    output = capsys.readouterr().out
+    assert 'Multiple DSS files found' in output
+    assert 'C:\\Models\\Test.dss, Other.dss' in output
+    assert 'Using: C:\\Models\\Test.dss' in output
+
+def test_find_b_file_dss_none(tmp_path):
+    b_file = tmp_path / 'Test.b01'
+    b_file.write_bytes(b'Plan Title=Test\nno dss here\n')
+    assert ras_parser.find_b_file_dss(str(b_file)) is None
+
+FLOW_FILE = '''Flow Title=Test Flow
+DSS File=.\\BC\\before.dss
+DSS Path=/A/X/FLOW/01JAN2020/1HOUR/F/
+Boundary Location=River,Reach,100,        ,        ,        ,        ,
+Flow Hydrograph= 2
+     10     20
+DSS File=.\\BC\\flow.dss
+DSS Path=/A/B/FLOW/01JAN2020/1HOUR/F/
+DSS File=.\\BC\\flow2.dss
+DSS Path=/A/B2/FLOW/01JAN2020/1HOUR/F/
+Boundary Location=River,Reach,0,        ,        ,        ,        ,
+Friction Slope=0.001,0
+Met BC=Precipitation|Gridded DSS Filename=.\\BC\\precip.dss
+Met BC=Precipitation|Gridded DSS Pathname=/SHG/X/PRECIP///AORC/
+'''
+
+def test_index_flow_file(tmp_path):
+    flow_file = tmp_path / 'Test.u01'
+    flow_file.write_text(FLOW_FILE)
+    flow_data = ras_parser.index_flow_file(str(flow_file))
+    assert flow_data['Flow Title'] == 'Test Flow'
+    records = [[bc['location'], bc['bc_type'], bc['dss_only'], bc['dss_file'], bc['dss_path']] for bc in flow_data['Boundary Conditions']]
+    assert records == [
+        ['DSS File', None, True, '.\\BC\\before.dss', '/A/X/FLOW/01JAN2020/1HOUR/F/'],
+        ['River, Reach, 100', 'Flow Hydrograph', False, '.\\BC\\flow.dss', '/A/B/FLOW/01JAN2020/1HOUR/F/'],
+        ['River, Reach, 100', None, True, '.\\BC\\flow2.dss', '/A/B2/FLOW/01JAN2020/1HOUR/F/'],
+        ['River, Reach, 0', 'Normal Depth', False, None, None],
+        ['Met BC', 'Precipitation', True, '.\\BC\\precip.dss', '/SHG/X/PRECIP///AORC/'],
+    ]
+
+    # Only the boundary locations are counted as boundary conditions.
+    assert ras_parser.count_boundary_conditions(flow_data['Boundary Conditions']) == [
+        {'parameter': 'Flow Hydrograph Boundary Conditions', 'value': 1},
+        {'parameter': 'Normal Depth Boundary Conditions', 'value': 1},
+    ]
+
+def test_plan_dependencies_include_templates(tmp_path, monkeypatch):
+    # The simulation template and schema are dependencies, and are found from the repository root on any OS.
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    p = str(tmp_path / 'Test.p01')
+    dependencies = ras_parser.get_plan_dependencies(p, {'Geom File': 'g01', 'Flow File': 'u01'}, 'Test', str(tmp_path / 'bnd.shp'))
+    for template in [os.path.join('example', 'input', 'json', 'ras_simulation.json'), os.path.join('example', 'input', 'json', 'simulation_schema.json')]:
+        assert dependencies[template] is not None
+    assert dependencies[p] is None
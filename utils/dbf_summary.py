@@ -0,0 +1,113 @@
+import struct
+import fnmatch
+import numpy as np
+
+# Default glob patterns of the result attribute columns to total, matched case-insensitively against the .dbf column names.
+# Such as life loss, structure, content, and agriculture damage, and structure and population counts.
+DEFAULT_SUMMARY_COLUMNS = ['*LifeLoss*', 'LL_*', '*Dam', '*Damage*', '*Count*', 'Num*', 'Pop*']
+# The number of records converted at a time, which bounds the memory used on large result layers.
+DEFAULT_CHUNK_RECORDS = 100000
+
+# dBase numeric column types. N and F are stored as ASCII text, I as a 4 byte integer, and O as an 8 byte double.
+TEXT_NUMERIC_TYPES = ['N', 'F']
+BINARY_NUMERIC_TYPES = {'I': '<i4', 'O': '<f8'}
+
+def read_dbf_header(f):
+    # Read the record count, header length, record length, and the columns of a .dbf file.
+    # Returns the header values and a list of {"name", "type", "offset", "length", "decimals"} for each column.
+    # Each column's offset is its position in the record, after the one byte deleted flag.
+    record_count, header_length, record_length = struct.unpack('<4xIHH20x', f.read(32))
+    columns = []
+    offset = 1
+    while True:
+        descriptor = f.read(32)
+        if len(descriptor) < 32 or descriptor[0] == 0x0D:
+            break
+        length = descriptor[16]
+        columns.append({
+            'name': descriptor[:11].split(b'\x00')[0].decode('ascii', errors='replace').strip(),
+            'type': chr(descriptor[11]),
+            'offset': offset,
+            'length': length,
+            'decimals': descriptor[17],
+        })
+        offset += length
+    return record_count, header_length, record_length, columns
+
+def to_number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+def to_numbers(values):
+    # Convert ASCII numeric column values to floats. Blank values, overflow markers ("*****"), and any other text are NaN.
+    values = np.char.strip(values)
+    valid = (values != b'') & (np.char.find(values, b'*') < 0)
+    numbers = np.full(len(values), np.nan)
+    try:
+        numbers[valid] = values[valid].astype(float)
+    except ValueError:
+        # Only convert value by value if the chunk has text that is not a number.
+        numbers[valid] = [to_number(value) for value in values[valid]]
+    return numbers
+
+def summarize_dbf(dbf_file, column_patterns=None, chunk_records=DEFAULT_CHUNK_RECORDS):
+    """
+    Total the numeric columns of a .dbf file that match column_patterns, without reading the shapefile geometry.
+    The records are memory-mapped as a NumPy structured array holding only the deleted flag and the wanted columns,
+    and are converted chunk_records at a time so memory stays bounded on large files. Deleted records and blank values are skipped.
+    Returns a dictionary of the record count and {column name: total}, or None if the file is not a valid .dbf file.
+    """
+    column_patterns = column_patterns if column_patterns is not None else DEFAULT_SUMMARY_COLUMNS
+    with open(dbf_file, 'rb') as f:
+        try:
+            record_count, header_length, record_length, columns = read_dbf_header(f)
+        except struct.error:
+            print(f'Unable to read dbf file: {dbf_file}')
+            return None
+
+    summary = {'record_count': 0, 'totals': {}}
+    wanted_columns = [
+        column for column in columns
+        if (column['type'] in TEXT_NUMERIC_TYPES or column['type'] in BINARY_NUMERIC_TYPES)
+        and any(fnmatch.fnmatch(column['name'].lower(), pattern.lower()) for pattern in column_patterns)
+    ]
+    if record_count == 0:
+        return summary
+
+    # Only the deleted flag and the wanted columns are in the record dtype, the other bytes are skipped by their offsets.
+    # The fields are named by position, since column names in a .dbf file are not always unique.
+    record_dtype = np.dtype({
+        'names': ['deleted'] + [f'column_{i}' for i in range(len(wanted_columns))],
+        'formats': ['S1'] + [BINARY_NUMERIC_TYPES.get(column['type'], f"S{column['length']}") for column in wanted_columns],
+        'offsets': [0] + [column['offset'] for column in wanted_columns],
+        'itemsize': record_length,
+    })
+    try:
+        records = np.memmap(dbf_file, dtype=record_dtype, mode='r', offset=header_length, shape=(record_count,))
+    except ValueError:
+        print(f'Unable to read dbf file: {dbf_file}. The file is shorter than its header record count.')
+        return None
+
+    totals = [0.0] * len(wanted_columns)
+    for start in range(0, record_count, chunk_records):
+        chunk = records[start:start + chunk_records]
+        active = chunk['deleted'] != b'*'
+        summary['record_count'] += int(np.count_nonzero(active))
+        for i, column in enumerate(wanted_columns):
+            values = chunk[f'column_{i}'][active]
+            if column['type'] in TEXT_NUMERIC_TYPES:
+                values = to_numbers(values)
+            totals[i] += float(np.nansum(values))
+    del records
+
+    for column, total in zip(wanted_columns, totals):
+        # Whole number columns are totaled as integers.
+        if column['decimals'] == 0 and column['type'] != 'O':
+            total = int(round(total))
+        else:
+            total = round(total, 2)
+        # Keep the first of any columns with the same name.
+        summary['totals'].setdefault(column['name'], total)
+    return summary
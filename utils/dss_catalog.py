@@ -0,0 +1,155 @@
+import os
+import re
+import mmap
+from datetime import datetime
+
+# Every DSS file, version 6 or 7, starts with this identifier, and has its version (Ex: "7-IQ" or "6-YO") in the first words of the header.
+DSS_IDENTIFIER = b'ZDSS'
+HEADER_BYTES = 64
+VERSION_PATTERN = re.compile(rb'([67])-[A-Z]{2}')
+
+# A DSS record pathname is six parts, A to F, between seven slashes. Each part is up to 64 printable characters other than "/".
+# The pathnames are stored as plain text in the pathname bins and record headers, so they are found without decoding any data values.
+# A pathname starts its own field, so a match preceded by another printable character is part of some other text and is skipped.
+PATHNAME_PATTERN = re.compile(rb'(?<![\x20-\x7e])/(?:[\x20-\x2e\x30-\x7e]{0,64}/){6}')
+# The number of bytes from the start of a DSS file searched for pathnames by default.
+# The pathname bins are near the start of the file, and this bounds the I/O on very large DSS files.
+DEFAULT_MAX_SCAN_BYTES = 64 * 1024 * 1024
+PATHNAME_PARTS = ['A', 'B', 'C', 'D', 'E', 'F']
+
+# Time series records are stored in blocks that start on the date in the D part. The block length depends on the E part interval.
+BLOCK_MONTHS = {}
+for interval in ['1MIN', '2MIN', '3MIN', '4MIN', '5MIN', '6MIN', 'IR-DAY']:
+    BLOCK_MONTHS[interval] = 0
+for interval in ['10MIN', '12MIN', '15MIN', '20MIN', '30MIN', '1HOUR', '2HOUR', '3HOUR', '4HOUR', '6HOUR', '8HOUR', '12HOUR', 'IR-MONTH']:
+    BLOCK_MONTHS[interval] = 1
+for interval in ['1DAY', 'IR-YEAR']:
+    BLOCK_MONTHS[interval] = 12
+for interval in ['1WEEK', 'TRI-MONTH', 'SEMI-MONTH', '1MONTH', 'IR-DECADE']:
+    BLOCK_MONTHS[interval] = 120
+for interval in ['1YEAR', 'IR-CENTURY']:
+    BLOCK_MONTHS[interval] = 1200
+
+def add_months(date, months):
+    # Get the first day of the month a number of months after the date.
+    month = date.month - 1 + months
+    return date.replace(year=date.year + month // 12, month=month % 12 + 1, day=1)
+
+def get_block_end(block_start, interval):
+    # Get the last day of a time series block. Returns the block start for unknown intervals.
+    months = BLOCK_MONTHS.get(interval.upper())
+    if months is None or months == 0:
+        return block_start
+    return datetime.fromordinal(add_months(block_start, months).toordinal() - 1)
+
+def read_dss_catalog(dss_file, max_scan_bytes=DEFAULT_MAX_SCAN_BYTES):
+    """
+    Read the catalog of a DSS file without loading any of its data values.
+    The file is memory-mapped, the header is checked, and the record pathnames are read from the file's text.
+    Only max_scan_bytes from the start of the file are searched for pathnames, or the whole file if max_scan_bytes is None.
+    Returns a dictionary of the DSS version, the pathnames split into their A to F parts, the date range from the time series D and E parts,
+    and whether the scan was truncated before the end of the file.
+    Returns None if the file is empty or is not a DSS file.
+    """
+    with open(dss_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as dss_map:
+            header = dss_map[:HEADER_BYTES]
+            if not header.startswith(DSS_IDENTIFIER):
+                return None
+            version = VERSION_PATTERN.search(header)
+
+            scan_end = len(dss_map) if max_scan_bytes is None else min(len(dss_map), max_scan_bytes)
+            truncated = scan_end < len(dss_map)
+            # The same pathname is in the pathname bin and the record header, so keep each unique pathname once, in file order.
+            pathnames = {}
+            for match in PATHNAME_PATTERN.finditer(dss_map, 0, scan_end):
+                pathnames[match.group().decode('ascii')] = None
+
+    catalog = {
+        'version': version.group().decode('ascii') if version is not None else None,
+        'truncated': truncated,
+        'pathnames': [],
+        'start': None,
+        'end': None,
+    }
+    for pathname in pathnames:
+        parts = dict(zip(PATHNAME_PARTS, pathname.split('/')[1:7]))
+        # Every record has a C part, the parameter, so matches without one are not pathnames.
+        if len(parts['C'].strip()) == 0:
+            continue
+        catalog['pathnames'].append({'pathname': pathname, **parts})
+
+        # The D part of a time series record is the start of its block.
+        try:
+            block_start = datetime.strptime(parts['D'].strip(), '%d%b%Y')
+        except ValueError:
+            continue
+        block_end = get_block_end(block_start, parts['E'].strip())
+        if catalog['start'] is None or block_start < catalog['start']:
+            catalog['start'] = block_start
+        if catalog['end'] is None or block_end > catalog['end']:
+            catalog['end'] = block_end
+
+    for key in ['start', 'end']:
+        if catalog[key] is not None:
+            catalog[key] = catalog[key].strftime('%Y-%m-%d')
+    return catalog
+
+def summarize_dss_catalog(dss_file, max_scan_bytes=DEFAULT_MAX_SCAN_BYTES):
+    # Get a summary of a DSS file's catalog that is small enough to cache: the version, record count, parameters (C parts), and date range.
+    # If the scan was truncated, the records past max_scan_bytes are missing, so the date range is left out.
+    # Returns None if the file cannot be read, and an empty dictionary if it is not a DSS file, so that result can be cached too.
+    try:
+        catalog = read_dss_catalog(dss_file, max_scan_bytes)
+    except (OSError, ValueError):
+        print(f'Unable to read DSS catalog: {dss_file}')
+        return None
+    if catalog is None:
+        print(f'Not a DSS file: {dss_file}')
+        return {}
+    return {
+        'version': catalog['version'],
+        'truncated': catalog['truncated'],
+        'record_count': len(catalog['pathnames']),
+        'parameters': list(dict.fromkeys([pathname['C'] for pathname in catalog['pathnames']])),
+        'scanned_bytes': max_scan_bytes if catalog['truncated'] else None,
+        'start': catalog['start'] if not catalog['truncated'] else None,
+        'end': catalog['end'] if not catalog['truncated'] else None,
+    }
+
+def format_bytes(size):
+    # Format a byte count in MB if it is a whole number of MB.
+    if size >= 1024 * 1024 and size % (1024 * 1024) == 0:
+        return f'{size // (1024 * 1024)} MB'
+    return f'{size} bytes'
+
+def describe_dss_file(dss_file, dss_cache=None, max_scan_bytes=DEFAULT_MAX_SCAN_BYTES):
+    # Describe a DSS file from its catalog summary for the json input and output file descriptions.
+    # dss_cache is an optional file_cache.DiskCache so unchanged DSS files are not read again.
+    # Returns None if the file does not exist or cannot be read as a DSS file.
+    if not os.path.isfile(dss_file):
+        return None
+    if dss_cache is not None:
+        summary = dss_cache.get(dss_file, lambda dss_file: summarize_dss_catalog(dss_file, max_scan_bytes))
+    else:
+        summary = summarize_dss_catalog(dss_file, max_scan_bytes)
+    if not summary:
+        return None
+
+    dss_version = f"DSS {summary['version'][0]}" if summary['version'] is not None else 'DSS'
+    # Only the start of a truncated file was searched, so it has at least the records found, and its date range is unknown.
+    truncated = summary.get('truncated', False)
+    at_least = 'at least ' if truncated else ''
+    description = f"{dss_version} file with {at_least}{summary['record_count']} record{'' if summary['record_count'] == 1 else 's'}"
+    if len(summary['parameters']) > 0:
+        parameters = summary['parameters'][:10]
+        more = f", and {len(summary['parameters']) - 10} more" if len(summary['parameters']) > 10 else ''
+        description = f"{description} of {', '.join(parameters)}{more}"
+    if truncated:
+        scanned = f"the first {format_bytes(summary['scanned_bytes'])}" if summary.get('scanned_bytes') else 'part'
+        description = f"{description}, read from {scanned} of the file only. Date range unknown"
+    elif summary['start'] is not None:
+        description = f"{description}, from {summary['start']} to {summary['end']}"
+    return description
@@ -0,0 +1,101 @@
+import os
+import json
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+
+# Default patterns for the files to index, and the number of directories listed at the same time.
+DEFAULT_INCLUDE = ['*.dss']
+DEFAULT_SCAN_WORKERS = 8
+
+def matches(name, rel_path, patterns):
+    # Case-insensitive match of a file or directory name, or its path relative to the root directory, against glob patterns.
+    name = name.lower()
+    rel_path = rel_path.lower()
+    return any(fnmatch.fnmatch(name, pattern.lower()) or fnmatch.fnmatch(rel_path, pattern.lower()) for pattern in patterns)
+
+def scan_dir(directory, rel_dir, include, exclude, cached_entry):
+    # List a single directory with os.scandir. Returns the directory's modified time, its indexed files, and its subdirectories.
+    # If the directory's modified time matches the cached entry, the cached listing is used and the directory is not listed again.
+    # A directory's modified time changes when files are added, removed, or renamed in it, but not when a file in it is rewritten in place.
+    mtime = os.stat(directory).st_mtime_ns
+    if cached_entry is not None and cached_entry['mtime'] == mtime:
+        return cached_entry, True
+
+    files = []
+    dirs = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+            if matches(entry.name, rel_path, exclude):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.name)
+            elif matches(entry.name, rel_path, include):
+                stat = entry.stat()
+                files.append({'name': entry.name, 'size': stat.st_size, 'mtime': stat.st_mtime_ns})
+
+    return {'mtime': mtime, 'files': sorted(files, key=lambda f: f['name']), 'dirs': sorted(dirs)}, False
+
+def index_dss_files(root_dir, include=None, exclude=None, max_depth=None, index_file=None, workers=DEFAULT_SCAN_WORKERS):
+    """
+    Recursively index the DSS files under root_dir, listing the directories of each level of the tree concurrently.
+    include and exclude are glob patterns matched against file and directory names or their paths relative to root_dir.
+    max_depth limits how many levels of subdirectories are searched (0 is only root_dir). None searches the whole tree.
+    If index_file is given, the listing of each directory is saved to it, and directories that are unchanged on the next run are not listed again.
+    Returns a sorted list of {"path", "size", "mtime"} for each file found.
+    """
+    include = include if include is not None else DEFAULT_INCLUDE
+    exclude = exclude if exclude is not None else []
+    settings = {'root': os.path.realpath(root_dir), 'include': include, 'exclude': exclude}
+
+    # Load the saved index. It is only used if it was made for the same directory with the same patterns.
+    cached_dirs = {}
+    if index_file is not None and os.path.exists(index_file):
+        try:
+            with open(index_file, 'r') as f:
+                saved_index = json.load(f)
+            if saved_index.get('settings') == settings:
+                cached_dirs = saved_index['directories']
+        except ValueError:
+            print(f'Unable to read DSS index file: {index_file}. Rebuilding index.')
+
+    directories = {}
+    reused = 0
+    level = ['']
+    depth = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while len(level) > 0:
+            futures = {}
+            for rel_dir in level:
+                directory = os.path.join(root_dir, rel_dir) if rel_dir else root_dir
+                futures[rel_dir] = executor.submit(scan_dir, directory, rel_dir, include, exclude, cached_dirs.get(rel_dir))
+
+            next_level = []
+            for rel_dir, future in futures.items():
+                try:
+                    entry, from_cache = future.result()
+                except OSError:
+                    print(f'Unable to read directory: {os.path.join(root_dir, rel_dir)}')
+                    continue
+                directories[rel_dir] = entry
+                reused += from_cache
+                if max_depth is None or depth < max_depth:
+                    next_level.extend([f'{rel_dir}/{d}' if rel_dir else d for d in entry['dirs']])
+            level = next_level
+            depth += 1
+
+    print(f'DSS index: {len(directories)} directories, {reused} unchanged directories not listed again.')
+
+    if index_file is not None:
+        with open(index_file, 'w') as f:
+            json.dump({'settings': settings, 'directories': directories}, f, indent=4)
+
+    dss_files = []
+    for rel_dir, entry in directories.items():
+        for file in entry['files']:
+            dss_files.append({
+                'path': os.path.join(root_dir, rel_dir, file['name']) if rel_dir else os.path.join(root_dir, file['name']),
+                'size': file['size'],
+                'mtime': file['mtime'],
+            })
+    return sorted(dss_files, key=lambda f: f['path'])
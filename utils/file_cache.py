@@ -0,0 +1,100 @@
+import os
+import json
+import threading
+
+def fingerprint(path):
+    # Get the resolved path, size, and modified time of a file.
+    # Used to tell if a file has changed since it was last parsed.
+    stat = os.stat(path)
+    return [os.path.realpath(path), stat.st_size, stat.st_mtime_ns]
+
+class FileCache:
+    """
+    In-memory cache of parsed files for a single extraction run.
+    Each file is parsed once by parse_func and the parsed result is shared by every caller that asks for the same unchanged file.
+    The cache can be shared by threads. A thread asking for a file that another thread is parsing waits for that result instead of parsing it again.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.key_locks = {}
+
+    def get(self, path, parse_func, key=None):
+        # Files are keyed by their fingerprint, unless the caller has its own key for the file, such as a normalized file name.
+        if key is None:
+            key = tuple(fingerprint(path))
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                return self.cache[key]
+            key_lock = self.key_locks.setdefault(key, threading.Lock())
+
+        # Only one thread parses each file. Files with different keys are parsed at the same time.
+        with key_lock:
+            with self.lock:
+                if key in self.cache:
+                    self.hits += 1
+                    return self.cache[key]
+            value = parse_func(path)
+            with self.lock:
+                self.misses += 1
+                self.cache[key] = value
+        return value
+
+    def stats(self):
+        return f'{self.name} cache: {self.hits} hits, {self.misses} misses'
+
+class DiskCache:
+    """
+    Cache of values read from files, saved to a json file so it persists between extraction runs.
+    Entries are keyed by the resolved file path and are only used while the file's size and modified time are unchanged.
+    """
+    def __init__(self, name, cache_file):
+        self.name = name
+        self.cache_file = cache_file
+        self.hits = 0
+        self.misses = 0
+        self.changed = False
+        self.cache = {}
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r') as f:
+                    self.cache = json.load(f)
+            except ValueError:
+                print(f'Unable to read {name} cache file: {cache_file}. Rebuilding cache.')
+
+    def lookup(self, path):
+        # Get the cached value for an unchanged file, or None if there is no cached value.
+        resolved_path, size, mtime = fingerprint(path)
+        entry = self.cache.get(resolved_path)
+        if entry is not None and entry['fingerprint'] == [size, mtime]:
+            self.hits += 1
+            return entry['value']
+        self.misses += 1
+        return None
+
+    def put(self, path, value):
+        # Cache a value read from a file, such as a value read in a worker process.
+        resolved_path, size, mtime = fingerprint(path)
+        self.cache[resolved_path] = {'fingerprint': [size, mtime], 'value': value}
+        self.changed = True
+
+    def get(self, path, read_func):
+        value = self.lookup(path)
+        if value is None:
+            value = read_func(path)
+            self.put(path, value)
+        return value
+
+    def save(self):
+        # Only rewrite the cache file if new values were read.
+        if self.changed:
+            with open(self.cache_file, 'w') as f:
+                json.dump(self.cache, f, indent=4)
+            self.changed = False
+
+    def stats(self):
+        return f'{self.name} cache: {self.hits} hits, {self.misses} misses'
@@ -1,4 +1,6 @@
 import geopandas as gpd
+import numpy as np
+import pyproj
 import yaml
 import os
 
@@ -19,6 +21,11 @@ def parse_shp(shp, prj_wkt, prj_name, output_dir):
     
     gdf = gdf.to_crs(4326)
     wkt = gdf.to_wkt().geometry[0]
+    write_wkt_yml(wkt, crs, prj_name, output_dir)
+    
+    return wkt, crs
+
+def write_wkt_yml(wkt, crs, prj_name, output_dir):
     wkt_dict = {}
     wkt_dict["spatial_extent"] = wkt
     wkt_dict["coordinate_system"] = crs
@@ -29,7 +36,80 @@ def parse_shp(shp, prj_wkt, prj_name, output_dir):
 
     with open(os.path.join(output_dir, f'{prj_name}_wkt.yml'), 'w+') as f:
         yaml.dump(wkt_dict, f)
-    
+
+def cross(o, a, b):
+    # z component of the cross product of the vectors o->a and o->b. Positive for a counter-clockwise turn.
+    return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - (a[..., 1] - o[..., 1]) * (b[..., 0] - o[..., 0])
+
+def convex_hull(points):
+    """
+    Get the convex hull of an (n, 2) array of points as a closed, counter-clockwise ring of points.
+    Points inside the quadrilateral of the extreme points are dropped with vectorized tests first,
+    so only the few points near the boundary are walked with the monotone chain algorithm.
+    """
+    points = np.unique(points, axis=0)
+    if len(points) < 3:
+        return points
+
+    # Drop the points strictly inside the quadrilateral of the min x, min y, max x, and max y points.
+    extremes = points[[points[:, 0].argmin(), points[:, 1].argmin(), points[:, 0].argmax(), points[:, 1].argmax()]]
+    inside = np.ones(len(points), dtype=bool)
+    for i in range(4):
+        inside &= cross(extremes[i], extremes[(i + 1) % 4], points) > 0
+    points = points[~inside]
+
+    # Monotone chain over the remaining points, sorted by x then y.
+    points = points[np.lexsort((points[:, 1], points[:, 0]))]
+    lower = []
+    for point in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    upper = []
+    for point in points[::-1]:
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+    hull = np.array(lower[:-1] + upper[:-1])
+    # Collinear points do not make a ring.
+    if len(hull) < 3:
+        return hull
+    return np.vstack([hull, hull[:1]])
+
+def format_coordinate(value):
+    return np.format_float_positional(value, precision=6, trim='-')
+
+def parse_coordinates(coordinates, crs_wkt, prj_name, output_dir):
+    """
+    Get the spatial extent of a model from an (n, 2) array of coordinates in the crs_wkt projection, without reading a shapefile.
+    The extent is the convex hull of the coordinates. Only the hull is reprojected to EPSG:4326.
+    Returns the same WKT and CRS as parse_shp, and writes the same {prj_name}_wkt.yml.
+    """
+    if crs_wkt is None:
+        raise Exception("Unable to find the model's coordinate system. Please provide a boundary shapefile with a CRS Projection.")
+    coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    coordinates = coordinates[np.isfinite(coordinates).all(axis=1)]
+    if len(coordinates) == 0:
+        raise Exception("Unable to find any model coordinates. Please provide a boundary shapefile.")
+
+    source_crs = pyproj.CRS.from_user_input(crs_wkt)
+    # HMS stores the coordinate system as ESRI WKT, so use the matching EPSG code when there is one.
+    epsg = source_crs.to_epsg()
+    crs = f'EPSG:{epsg}' if epsg is not None else str(source_crs)
+    hull = convex_hull(coordinates)
+    transformer = pyproj.Transformer.from_crs(source_crs, 4326, always_xy=True)
+    x, y = transformer.transform(hull[:, 0], hull[:, 1])
+    ring = ', '.join([f'{format_coordinate(x[i])} {format_coordinate(y[i])}' for i in range(len(x))])
+
+    # Fewer than 3 unique coordinates do not make a polygon.
+    if len(hull) == 1:
+        wkt = f'POINT ({ring})'
+    elif len(hull) == 2:
+        wkt = f'LINESTRING ({ring})'
+    else:
+        wkt = f'POLYGON (({ring}))'
+
+    write_wkt_yml(wkt, crs, prj_name, output_dir)
     return wkt, crs
 
 if __name__ == '__main__':
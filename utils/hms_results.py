@@ -0,0 +1,120 @@
+import xml.etree.ElementTree as ET
+
+# Statistic types in an HMS results file for the peak flow, time of peak, and volume of each element.
+PEAK_FLOW = 'Outflow Maximum'
+PEAK_TIME = 'Outflow Maximum Time'
+VOLUME = 'Outflow Volume'
+# The element's drainage area is kept with its statistics, to total volumes reported as a depth over the drainage area.
+DRAINAGE_AREA = 'Drainage Area'
+DEPTH_UNITS = ['IN', 'MM']
+
+def iter_results_elements(results_file):
+    """
+    Stream the basin elements of an HMS .results XML file with iterparse.
+    Yields (name, type, statistics) for each BasinElement, where statistics is {statistic type: (value, units)},
+    including the element's Drainage Area if it has one.
+    Each element is cleared and removed from its parent once it has been read, so memory stays bounded by the largest single element.
+    """
+    stack = []
+    for event, elem in ET.iterparse(results_file, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag != 'BasinElement':
+            continue
+
+        statistics = {}
+        for measure in elem.iter('StatisticMeasure'):
+            statistic_type = measure.get('type')
+            if statistic_type is not None and statistic_type not in statistics:
+                statistics[statistic_type] = (measure.get('value'), measure.get('units'))
+        drainage = elem.find('Drainage')
+        if drainage is not None:
+            statistics[DRAINAGE_AREA] = (drainage.get('area'), drainage.get('units'))
+        yield elem.get('name'), elem.get('type'), statistics
+
+        elem.clear()
+        if len(stack) > 0:
+            stack[-1].remove(elem)
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def get_total_volume(outlet_statistics):
+    # Get the total volume leaving the basin, and its units, from the statistics of each outlet.
+    # Volumes reported as a depth (IN or MM) are averaged over the outlets' drainage areas, so the total is the depth over the whole basin.
+    # Returns None unless every outlet has a volume, and a drainage area for depths, in the same units.
+    volumes = [statistics.get(VOLUME, (None, None)) for statistics in outlet_statistics]
+    values = [to_float(value) for value, units in volumes]
+    volume_units = set([units for value, units in volumes])
+    if len(volumes) == 0 or None in values or len(volume_units) != 1:
+        return None
+    units = volume_units.pop()
+    if units is None or units.upper() not in DEPTH_UNITS:
+        return sum(values), units
+
+    areas = [statistics.get(DRAINAGE_AREA, (None, None)) for statistics in outlet_statistics]
+    area_values = [to_float(value) for value, area_units in areas]
+    if None in area_values or len(set([area_units for value, area_units in areas])) != 1 or sum(area_values) <= 0:
+        return None
+    return sum([value * area for value, area in zip(values, area_values)]) / sum(area_values), units
+
+def summarize_results_file(results_file, outlets):
+    # Summarize an HMS run's results: the number of elements with results, the peak flow, time of peak, and volume at each outlet,
+    # and the total volume leaving the basin through all of its outlets.
+    # outlets are the names of the basin elements without a downstream element.
+    # Returns a list of parameters in the format of the simulation json, or an empty list if the results file cannot be read.
+    element_count = 0
+    outlet_statistics = {}
+    outlet_names = set(outlets)
+    try:
+        for name, element_type, statistics in iter_results_elements(results_file):
+            element_count += 1
+            if name in outlet_names:
+                outlet_statistics[name] = statistics
+    except (OSError, ET.ParseError):
+        print(f'Unable to read results file: {results_file}')
+        return []
+
+    parameters = [
+        {
+            "parameter": "Result Elements",
+            "value": element_count,
+        }
+    ]
+    # Report the outlets in the order of the basin file.
+    outlets = [outlet for outlet in outlets if outlet in outlet_statistics]
+    for outlet in outlets:
+        statistics = outlet_statistics[outlet]
+        for statistic_type, title in [[PEAK_FLOW, 'Peak Flow'], [VOLUME, 'Volume']]:
+            if statistic_type in statistics:
+                value, units = statistics[statistic_type]
+                value = to_float(value)
+                parameters.append(
+                    {
+                        "parameter": f"{outlet} {title} ({units})" if units else f"{outlet} {title}",
+                        "value": round(value, 2) if value is not None else None,
+                    }
+                )
+        if PEAK_TIME in statistics:
+            parameters.append(
+                {
+                    "parameter": f"{outlet} Time of Peak",
+                    "value": statistics[PEAK_TIME][0],
+                }
+            )
+
+    total_volume = get_total_volume([outlet_statistics[outlet] for outlet in outlets])
+    if total_volume is not None:
+        total_volume, units = total_volume
+        parameters.append(
+            {
+                "parameter": f"Total Volume ({units})" if units else "Total Volume",
+                "value": round(total_volume, 2),
+            }
+        )
+    return parameters
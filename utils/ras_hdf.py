@@ -0,0 +1,182 @@
+import h5py
+import numpy as np
+
+# Root attributes and Geometry attributes read from each RAS plan hdf file.
+ROOT_ATTRS = ['Projection']
+GEOMETRY_ATTRS = ['Terrain Filename', 'Infiltration Filename', 'Land Cover Filename', 'Percent Impervious Filename']
+
+def decode_attr(value):
+    # HDF string attributes are stored as bytes by RAS.
+    if isinstance(value, bytes):
+        return value.decode('UTF-8')
+    return str(value)
+
+def read_plan_hdf_meta(p_hdf):
+    # Read all of the wanted root and Geometry attributes from a plan hdf file with a single open.
+    # Attributes that are missing from the file are set to None.
+    # Raises an exception if the file itself cannot be opened.
+    meta = {}
+    with h5py.File(p_hdf, "r") as f:
+        for attr in ROOT_ATTRS:
+            meta[attr] = decode_attr(f.attrs[attr]) if attr in f.attrs else None
+
+        geometry_attrs = f['Geometry'].attrs if 'Geometry' in f else {}
+        for attr in GEOMETRY_ATTRS:
+            meta[attr] = decode_attr(geometry_attrs[attr]) if attr in geometry_attrs else None
+
+    return meta
+
+# Result dataset groups in a plan hdf file.
+BASE_OUTPUT = 'Results/Unsteady/Output/Output Blocks/Base Output'
+TIME_SERIES = f'{BASE_OUTPUT}/Unsteady Time Series'
+SUMMARY_OUTPUT = f'{BASE_OUTPUT}/Summary Output'
+
+def iter_blocks(dataset, axis, max_bytes):
+    # Get slices along an axis of a dataset, sized to the dataset's hdf chunks and so each block holds at most max_bytes.
+    n = dataset.shape[axis]
+    # Size of one index along the axis, for all of the other axes.
+    index_bytes = dataset.dtype.itemsize
+    for i, size in enumerate(dataset.shape):
+        if i != axis:
+            index_bytes *= size
+    block_size = max(1, max_bytes // max(1, index_bytes))
+    if dataset.chunks is not None:
+        chunk_size = dataset.chunks[axis]
+        block_size = max(chunk_size, (block_size // chunk_size) * chunk_size)
+    for start in range(0, n, block_size):
+        yield slice(start, min(n, start + block_size))
+
+def max_over_time(dataset, cells, max_bytes):
+    # Get the maximum of each cell in a cell slice of a (time, cell) dataset, reading the time steps in blocks.
+    # If the dataset has no time steps, every cell's maximum is NaN.
+    if dataset.shape[0] == 0:
+        return np.full(cells.stop - cells.start, np.nan)
+    cell_max = None
+    sub_dataset_shape = [dataset.shape[0], cells.stop - cells.start]
+    time_block_size = max(1, max_bytes // max(1, dataset.dtype.itemsize * sub_dataset_shape[1]))
+    if dataset.chunks is not None:
+        time_block_size = max(dataset.chunks[0], (time_block_size // dataset.chunks[0]) * dataset.chunks[0])
+    for start in range(0, dataset.shape[0], time_block_size):
+        block = dataset[start:min(dataset.shape[0], start + time_block_size), cells]
+        # fmax ignores NaN values, such as cells that are never wet, without a warning.
+        block_max = np.fmax.reduce(block, axis=0)
+        cell_max = block_max if cell_max is None else np.fmax(cell_max, block_max)
+    return cell_max
+
+class RunningStats:
+    # Maximum, mean, and count of values accumulated one block at a time, ignoring NaN values.
+    def __init__(self):
+        self.max = None
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, values):
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        block_max = float(values.max())
+        self.max = block_max if self.max is None else max(self.max, block_max)
+        self.sum += float(values.sum(dtype=np.float64))
+        self.count += int(values.size)
+
+    def mean(self):
+        return self.sum / self.count if self.count > 0 else None
+
+def summarize_2d_area(f, area, max_bytes):
+    # Summarize the maximum water surface and depth of a 2D flow area, reading the cells in blocks of at most max_bytes.
+    summary = {}
+    area_geometry = f.get(f'Geometry/2D Flow Areas/{area}')
+    min_elevation = area_geometry.get('Cells Minimum Elevation') if area_geometry is not None else None
+
+    # Use the maximum water surface from the summary output if available, otherwise compute it from the time series.
+    summary_wse = f.get(f'{SUMMARY_OUTPUT}/2D Flow Areas/{area}/Maximum Water Surface')
+    time_series_wse = f.get(f'{TIME_SERIES}/2D Flow Areas/{area}/Water Surface')
+    time_series_depth = f.get(f'{TIME_SERIES}/2D Flow Areas/{area}/Depth')
+    if summary_wse is not None:
+        n_cells = summary_wse.shape[1]
+    elif time_series_wse is not None:
+        n_cells = time_series_wse.shape[1]
+    else:
+        return summary
+
+    wse_stats = RunningStats()
+    depth_stats = RunningStats()
+    wet_cells = 0
+    has_depth = time_series_depth is not None or min_elevation is not None
+    for cells in iter_blocks(time_series_wse if summary_wse is None else summary_wse, 1, max_bytes):
+        if summary_wse is not None:
+            # The first row is the maximum value, the second row is the time of the maximum.
+            cell_wse = summary_wse[0, cells]
+        else:
+            cell_wse = max_over_time(time_series_wse, cells, max_bytes)
+        wse_stats.add(cell_wse)
+
+        if time_series_depth is not None:
+            cell_depth = max_over_time(time_series_depth, cells, max_bytes)
+        elif min_elevation is not None:
+            cell_depth = cell_wse - min_elevation[cells]
+        else:
+            continue
+        wet = cell_depth > 0
+        wet_cells += int(np.count_nonzero(wet))
+        depth_stats.add(cell_depth[wet])
+
+    # Cell Count in the 2D Flow Area attributes does not include the ghost cells along the area boundary.
+    attributes = f.get('Geometry/2D Flow Areas/Attributes')
+    cell_count = n_cells
+    if attributes is not None and attributes.dtype.names is not None and 'Cell Count' in attributes.dtype.names:
+        for row in attributes[()]:
+            if decode_attr(row['Name']).strip() == area:
+                cell_count = int(row['Cell Count'])
+
+    summary['Cell Count'] = cell_count
+    summary['Maximum Water Surface'] = wse_stats.max
+    summary['Mean Maximum Water Surface'] = wse_stats.mean()
+    if has_depth:
+        summary['Wet Cells'] = wet_cells
+        summary['Maximum Depth'] = depth_stats.max
+        summary['Mean Maximum Depth'] = depth_stats.mean()
+    return summary
+
+def summarize_peak_flows(f, group_name, max_bytes):
+    # Get the peak flow of each reference line or reference point, reading the time steps in blocks.
+    peak_flows = {}
+    group = f.get(f'{TIME_SERIES}/{group_name}')
+    if group is None or 'Flow' not in group:
+        return peak_flows
+    flow = group['Flow']
+    # Skip a flow dataset without any time steps, such as from a run that stopped before writing output.
+    if flow.shape[0] == 0:
+        return peak_flows
+    names = [decode_attr(name).strip() for name in group['Name'][()]] if 'Name' in group else []
+    peaks = max_over_time(flow, slice(0, flow.shape[1]), max_bytes)
+    for i, peak in enumerate(peaks):
+        name = names[i] if i < len(names) else str(i)
+        peak_flows[name] = None if np.isnan(peak) else float(peak)
+    return peak_flows
+
+def summarize_plan_results(p_hdf, max_bytes=64 * 1024 ** 2):
+    # Summarize the results of a plan hdf file: 2D flow area cell counts, maximum water surface and depth, and reference line and point peak flows.
+    # Datasets are read in blocks of at most max_bytes, so the full time series is never loaded at once.
+    # Returns a list of parameters in the format of the simulation json.
+    parameters = []
+    with h5py.File(p_hdf, "r") as f:
+        area_names = []
+        for group in [f'{SUMMARY_OUTPUT}/2D Flow Areas', f'{TIME_SERIES}/2D Flow Areas']:
+            if group in f:
+                area_names.extend([name for name in f[group].keys() if isinstance(f[group][name], h5py.Group)])
+        for area in dict.fromkeys(area_names):
+            for key, value in summarize_2d_area(f, area, max_bytes).items():
+                parameters.append({
+                    "parameter": f"{area} {key}",
+                    "value": round(value, 2) if isinstance(value, float) else value,
+                })
+
+        for group_name, title in [['Reference Lines', 'Reference Line'], ['Reference Points', 'Reference Point']]:
+            for name, peak_flow in summarize_peak_flows(f, group_name, max_bytes).items():
+                parameters.append({
+                    "parameter": f"{title} {name} Peak Flow",
+                    "value": round(peak_flow, 2) if peak_flow is not None else None,
+                })
+
+    return parameters
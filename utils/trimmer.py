@@ -1,20 +1,48 @@
-import copy
-
-def trim(lines):
-
-    keyValueList = copy.deepcopy(lines)  
-    # Create a pop list of indices to remove because missing key=value pairs.
+def trim_file(f, stop_keys=None, max_bytes=None):
+    # Read key=value pairs in a single pass from an open file handle, or any iterable of lines.
+    # If stop_keys is given, reading stops as soon as each of the stop_keys has been found.
+    # If max_bytes is given, reading stops once that many characters have been read.
+    keyValues_dict = {}
+    # Create a pop list of line indices that are missing key=value pairs.
     popList = []
-    
-    for i,v in enumerate(keyValueList):
+    remaining_keys = set(stop_keys) if stop_keys is not None else None
+    bytes_read = 0
+
+    for i, v in enumerate(f):
+        if max_bytes is not None:
+            bytes_read += len(v)
+            if bytes_read > max_bytes:
+                break
+        v = v.strip('\n')
         if '=' not in v:
             popList.append(i)
-    
-    # Remove indices in popList
-    for index in sorted(popList, reverse=True):
-        del keyValueList[index]
+            continue
+
+        key, value = v.split('=', 1)
+        keyValues_dict[key] = value
+
+        # Stop early once all of the requested keys have been seen.
+        if remaining_keys is not None:
+            remaining_keys.discard(key)
+            if len(remaining_keys) == 0:
+                break
+
+    return keyValues_dict, popList
+
+def trim(lines):
+    # Create dictionary from the key=value lines, and a list of indices of the lines without key=value pairs.
+    return trim_file(lines)
+
+def trim_header(file, keys, max_bytes=65536):
+    # Read only the header of a key=value file, until each of the keys has been found.
+    # Reading is capped at max_bytes, and only continues through the rest of the file if a key is not found in the header.
+    # Returns a dictionary of the key=value pairs read.
+    with open(file, "r") as f:
+        keyValues_dict, popList = trim_file(f, stop_keys=keys, max_bytes=max_bytes)
+        missing_keys = [key for key in keys if key not in keyValues_dict]
+        if len(missing_keys) > 0:
+            print(f'{", ".join(missing_keys)} not found in the first {max_bytes} bytes of: {file}. Reading the full file.')
+            f.seek(0)
+            keyValues_dict, popList = trim_file(f, stop_keys=keys)
 
-    # Create dictionary from trimmed list
-    keyValues_dict = dict(s.split('=',1) for s in keyValueList)
-    
-    return keyValues_dict, popList
\ No newline at end of file
+    return keyValues_dict